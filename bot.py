@@ -3,356 +3,514 @@ SecretCourse Discord Bot - Main Bot File
 Phase 1: Basic bot setup with command framework and database initialization
 """
 import discord
-from discord.ext import commands
+from discord import app_commands
 import logging
 import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
 from datetime import datetime
 
 from config import config
 from db_manager import db_manager
 from log_watcher import log_watcher
+from formatters import rank_prefix
 from message_manager import message_manager
+from scheduler import scheduler, Priority
 
-from typing import Dict, List
+from typing import Dict, List, Literal, Optional
+
+try:
+    import uvloop  # Optional: faster event loop (not available on Windows)
+except ImportError:
+    uvloop = None
 
 # Setup logging
 config.setup_logging()
 logger = logging.getLogger(__name__)
 
-class SecretCourseBot(commands.Bot):
+class _Cfg:
+    """Snapshot of config values read on every interaction"""
+    admin_role = "Admin"
+    admin_roles = frozenset({"Admin"})
+    announcement_channel_id = None
+    discord_token = None
+    live_messages_enabled = False
+    min_courses_required = 0
+    best_courses_count = 0
+    
+    @classmethod
+    def refresh(cls):
+        """Reload the snapshot from config (runs after every config.set)"""
+        cls.admin_role = config.get("admin_role", "Admin")
+        cls.admin_roles = frozenset({cls.admin_role})
+        cls.announcement_channel_id = config.get("announcement_channel_id")
+        cls.discord_token = config.get("discord_token")
+        cls.live_messages_enabled = config.get("live_messages_enabled", False)
+        cls.min_courses_required = config.get("min_courses_required", 0)
+        cls.best_courses_count = config.get("best_courses_count", 0)
+
+_Cfg.refresh()
+config.subscribe(_Cfg.refresh)
+
+# File paths are fixed for the process lifetime
+_MAIN_DB_PATH = config.get("main_db_path")
+_LOG_FILE_PATH = config.get("log_file_path")
+
+# Static replies, built once instead of on every invocation
+NO_ACTIVE_SEASON_MSG = "❌ No active season found."
+SCORING_USAGE_MSG = "❌ Usage: `scoring setting:min number:<number>` or `scoring setting:best number:<number>`"
+MESSAGES_USAGE_MSG = "❌ Usage: `/secretcourse config messages <on|off>`"
+TOGGLE_USAGE_MSGS = {
+    message_type: f"❌ Usage: `/secretcourse toggle {message_type} <on|off>`"
+    for message_type in ("summary", "standings", "grid")
+}
+
+# Accepted argument values, checked by set membership
+LOG_LEVELS = ("off", "minimal", "debug")
+LOG_LEVELS_SET = frozenset(LOG_LEVELS)
+INVALID_LOG_LEVEL_MSG = f"❌ Invalid log level. Valid options: {', '.join(LOG_LEVELS)}"
+MESSAGES_ON = frozenset({"on", "enable", "true"})
+MESSAGES_OFF = frozenset({"off", "disable", "false"})
+TOGGLE_ON = frozenset({"on", "true"})
+TOGGLE_OFF = frozenset({"off", "false"})
+ACTIVE_FILTERS = frozenset({"true", "active", "yes", "1"})
+
+def _parse_switch(value: Optional[str], on: frozenset, off: frozenset) -> Optional[bool]:
+    """Parse an on/off style argument; None if it isn't one of the accepted values"""
+    choice = value.lower() if value else ""
+    if choice in on:
+        return True
+    if choice in off:
+        return False
+    return None
+
+# Lookup tables for the setting-style subcommands
+TOGGLE_CONFIG_KEYS = {
+    "summary": "season_summary",
+    "standings": "season_standings",
+    "grid": "course_grid",
+}
+SCORING_SETTINGS = {
+    # setting: (config key, description, suffix when set to 0)
+    "min": ("min_courses_required", "Minimum courses required", " (disabled)"),
+    "best": ("best_courses_count", "Best courses count", " (all courses count)"),
+}
+
+async def _astat(path: str) -> Optional[os.stat_result]:
+    """stat() a path in a worker thread; None if it can't be stat'ed (like os.path.exists)"""
+    try:
+        return await asyncio.to_thread(os.stat, path)
+    except (OSError, TypeError):  # TypeError: path not configured
+        return None
+
+@functools.lru_cache(maxsize=1024)
+def _fmt_ts(ts: int, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
+    """Format a unix timestamp (cached - season dates don't change)"""
+    return datetime.fromtimestamp(ts).strftime(fmt)
+
+class SecretCourseBot(discord.Client):
     """Main bot class"""
     
     def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
+        # Slash commands only - no message content needed
+        super().__init__(intents=discord.Intents.default())
+        self.tree = app_commands.CommandTree(self)
         
-        super().__init__(
-            command_prefix='!',  # We'll use slash commands, but prefix needed
-            intents=intents,
-            help_command=None
-        )
+        # Admin role names resolved to role IDs, per guild
+        self._admin_role_ids: Dict[int, frozenset] = {}
+        
+        # on_ready fires again after gateway reconnects; background jobs must only start once
+        self._background_started = False
+    
+    def admin_role_ids(self, guild: discord.Guild) -> frozenset:
+        """Get the IDs of the guild's admin roles, resolving them from the configured names once"""
+        role_ids = self._admin_role_ids.get(guild.id)
+        if role_ids is None:
+            role_ids = frozenset(role.id for role in guild.roles if role.name in _Cfg.admin_roles)
+            self._admin_role_ids[guild.id] = role_ids
+        return role_ids
+    
+    async def on_guild_remove(self, guild: discord.Guild):
+        self._admin_role_ids.pop(guild.id, None)
+    
+    async def on_guild_role_create(self, role: discord.Role):
+        self._admin_role_ids.pop(role.guild.id, None)
+    
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._admin_role_ids.pop(role.guild.id, None)
+    
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self._admin_role_ids.pop(after.guild.id, None)
+    
+    def command_tree_hash(self) -> str:
+        """Hash the local slash command definitions to detect changes between restarts"""
+        payloads = []
+        for command in self.tree.get_commands():
+            try:
+                payloads.append(command.to_dict(self.tree))  # discord.py 2.4+
+            except TypeError:
+                payloads.append(command.to_dict())
+        return hashlib.sha256(json.dumps(payloads, sort_keys=True).encode()).hexdigest()
     
     async def setup_hook(self):
         """Called when bot is starting up"""
         logger.info("Bot setup starting...")
         
-        # Initialize bot database
-        await db_manager.init_bot_database()
-        
-        # Setup log watcher with bot reference
+        # Setup log watcher and message manager with bot reference
         log_watcher.bot = self
-
-        # Setup message manager
         message_manager.set_bot(self)
         
-        # Sync slash commands
+        # Database setup and the slash command sync are independent
+        await asyncio.gather(self._init_database(), self._sync_commands())
+    
+    async def _init_database(self):
+        """Initialize the bot database"""
+        await db_manager.init_bot_database()
+        await db_manager.apply_pragmas()
+    
+    async def _sync_commands(self):
+        """Sync slash commands to the dev guild, or globally when they have changed"""
         try:
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} slash commands")
+            dev_guild_id = config.get("dev_guild_id")
+            if dev_guild_id:
+                # Guild commands propagate instantly and avoid the global sync rate limit
+                guild = discord.Object(id=int(dev_guild_id))
+                self.tree.copy_global_to(guild=guild)
+                synced = await self.tree.sync(guild=guild)
+                logger.info("Synced %s slash commands to guild %s", len(synced), dev_guild_id)
+            elif config.get("synced_commands_hash") != (tree_hash := self.command_tree_hash()):
+                synced = await self.tree.sync()
+                config.set("synced_commands_hash", tree_hash)
+                logger.info("Synced %s slash commands", len(synced))
+            else:
+                logger.info("Slash commands unchanged, skipping global sync")
         except Exception as e:
-            logger.error(f"Failed to sync commands: {e}")
+            logger.error("Failed to sync commands: %s", e)
     
     async def on_ready(self):
         """Called when bot has connected to Discord"""
-        logger.info(f"Bot logged in as {self.user} (ID: {self.user.id})")
-        logger.info(f"Connected to {len(self.guilds)} guild(s)")
+        logger.info("Bot logged in as %s (ID: %s)", self.user, self.user.id)
+        logger.info("Connected to %s guild(s)", len(self.guilds))
+        
+        if self._background_started:
+            logger.info("Reconnected - background jobs already running")
+            return
+        self._background_started = True
+        
+        # Background work goes through the scheduler so the log watcher is
+        # started ahead of lower-priority jobs
+        scheduler.start()
+        scheduler.submit(Priority.HIGH, log_watcher.start_monitoring)
         
-        # Set bot status
-        await self.change_presence(
+        # Start live message updates
+        if _Cfg.live_messages_enabled:
+            scheduler.submit(Priority.NORMAL, message_manager.start_live_updates)
+        
+        # Set bot status in the background so ready handling isn't held up
+        scheduler.submit(Priority.LOW, lambda: self.change_presence(
             activity=discord.Activity(
                 type=discord.ActivityType.watching, 
                 name="secret courses expire"
             )
-        )
-        
-        # Start log monitoring
-        asyncio.create_task(log_watcher.start_monitoring())
-
-        # Start live message updates
-        if config.get("live_messages_enabled", False):
-            asyncio.create_task(message_manager.start_live_updates())
+        ), name="change_presence")
 
 bot = SecretCourseBot()
 
 def has_admin_role():
     """Check if user has admin role"""
     async def predicate(interaction: discord.Interaction) -> bool:
-        admin_role = config.get("admin_role", "Admin")
-        if any(role.name == admin_role for role in interaction.user.roles):
+        if interaction.guild is not None and any(
+            interaction.user.get_role(role_id) for role_id in bot.admin_role_ids(interaction.guild)
+        ):
             return True
         
         await interaction.response.send_message(
-            f"❌ You need the '{admin_role}' role to use this command.", 
+            f"❌ You need the '{_Cfg.admin_role}' role to use this command.", 
             ephemeral=True
         )
         return False
     
-    return discord.app_commands.check(predicate)
-
-@bot.tree.command(name="secretcourse", description="SecretCourse bot management commands")
-@discord.app_commands.describe(
-    action="Action to perform",
-    subaction="Sub-action (for season commands)",
-    value="Value for the action"
-)
-async def secretcourse(
-    interaction: discord.Interaction,
-    action: str,
-    subaction: str = None,
-    value: str = None
-):
-    """Main command dispatcher for all bot functions"""
-    
-    # For now, just handle basic commands
-    if action == "season":
-        if subaction == "info":
-            await handle_season_info(interaction)
-        elif subaction == "start":
-            await handle_season_start(interaction, value)
-        elif subaction == "end":
-            await handle_season_end(interaction)
-        else:
-            await interaction.response.send_message(
-                "❌ Available season commands: `info`, `start <season_number> [title]`, `end`",
-                ephemeral=True
-            )
-    
-    elif action == "config":
-        if subaction == "channel":
-            await handle_config_channel(interaction, value)
-        elif subaction == "loglevel":
-            await handle_config_loglevel(interaction, value)
-        elif subaction == "messages":
-            await handle_config_messages(interaction, value)
-        elif subaction == "scoring":
-            await handle_config_scoring(interaction, value)
-        else:
-            await interaction.response.send_message(
-                "❌ Available config commands: `channel <channel_id>`, `loglevel <off|minimal|debug>`, `messages <on|off>`, `scoring [min|best <number>]`",
-                ephemeral=True
-            )
-    elif action == "leaderboard":
-        await handle_leaderboard(interaction, subaction)
-    elif action == "courses":
-        await handle_courses_list(interaction, subaction)
-    
-    elif action == "test":
-        await handle_test(interaction)
-    
-    elif action == "debug":
-        if subaction == "logstatus":
-            await handle_debug_logstatus(interaction)
-        elif subaction == "courses":
-            await handle_debug_courses(interaction)
-        else:
-            await interaction.response.send_message(
-                "❌ Available debug commands: `logstatus`, `courses`",
-                ephemeral=True
-            )
-    elif action == "update":
-        await handle_update_messages(interaction)
-
-    elif action == "toggle":
-        if subaction in ["summary", "standings", "grid"]:
-            await handle_toggle_message(interaction, subaction, value)
-        else:
-            await interaction.response.send_message(
-                "❌ Available toggles: `summary <on|off>`, `standings <on|off>`, `grid <on|off>`",
-                ephemeral=True
-            )
+    return app_commands.check(predicate)
+
+def error_boundary(user_msg: str):
+    """Log any exception raised by a handler and reply with a generic error"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+            try:
+                return await func(interaction, *args, **kwargs)
+            except Exception:
+                logger.exception("Error in %s", func.__name__)
+                if interaction.response.is_done():
+                    # Ephemeral only if the command deferred ephemerally
+                    await interaction.followup.send(user_msg, ephemeral=True)
+                else:
+                    await interaction.response.send_message(user_msg, ephemeral=True)
+        return wrapper
+    return decorator
+
+# /secretcourse command tree - Discord parses and validates the options and
+# routes each subcommand straight to its callback
+secretcourse_group = app_commands.Group(name="secretcourse", description="SecretCourse bot management commands")
+season_group = app_commands.Group(name="season", description="Season management", parent=secretcourse_group)
+config_group = app_commands.Group(name="config", description="Bot configuration (Admin)", parent=secretcourse_group)
+debug_group = app_commands.Group(name="debug", description="Debugging information", parent=secretcourse_group)
+toggle_group = app_commands.Group(name="toggle", description="Toggle live messages (Admin)", parent=secretcourse_group)
+
+# Fixed-choice options are typed as Literal so Discord offers (and enforces) the
+# choices client-side; the handlers still validate for safety.
+# Every callback defers first to acknowledge within Discord's 3s window; handlers
+# reply via followup. The first followup inherits the visibility of the defer, so
+# admin, config and diagnostic commands defer ephemerally and the public commands
+# (season info/start, leaderboard, courses, update) reply publicly, errors included.
+
+@season_group.command(name="info", description="Show current season status and course count")
+async def season_info(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True)
+    await handle_season_info(interaction)
+
+@season_group.command(name="start", description="Start a new season (Admin)")
+@app_commands.describe(number="Season number", title="Optional season title")
+@has_admin_role()
+async def season_start(interaction: discord.Interaction, number: int, title: Optional[str] = None):
+    await interaction.response.defer(thinking=True)
+    await handle_season_start(interaction, number, title)
+
+@season_group.command(name="end", description="End the current season with confirmation (Admin)")
+@has_admin_role()
+async def season_end(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_season_end(interaction)
+
+@config_group.command(name="channel", description="Set the announcement channel for live messages")
+@app_commands.describe(channel="Channel to post live messages in")
+@has_admin_role()
+async def config_channel(interaction: discord.Interaction, channel: discord.TextChannel):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_config_channel(interaction, channel)
+
+@config_group.command(name="loglevel", description="Set bot logging verbosity")
+@app_commands.describe(value="off, minimal or debug")
+@has_admin_role()
+async def config_loglevel(interaction: discord.Interaction, value: Literal["off", "minimal", "debug"]):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_config_loglevel(interaction, value)
+
+@config_group.command(name="messages", description="Enable/disable live message updates")
+@app_commands.describe(value="on or off")
+@has_admin_role()
+async def config_messages(interaction: discord.Interaction, value: Literal["on", "off"]):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_config_messages(interaction, value)
+
+@config_group.command(name="scoring", description="View or change scoring settings")
+@app_commands.describe(setting="min or best (omit to view current settings)", number="New value (0 = disabled/all)")
+@has_admin_role()
+async def config_scoring(interaction: discord.Interaction, setting: Optional[Literal["min", "best"]] = None, number: Optional[int] = None):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_config_scoring(interaction, setting, number)
+
+@secretcourse_group.command(name="leaderboard", description="Show top 10 leaderboard (current or specified season)")
+@app_commands.describe(season_number="Season to show (defaults to the active season)")
+async def show_leaderboard(interaction: discord.Interaction, season_number: Optional[int] = None):
+    await interaction.response.defer(thinking=True)
+    await handle_leaderboard(interaction, season_number)
+
+@secretcourse_group.command(name="courses", description="List all courses (or only active ones)")
+@app_commands.describe(value="'active' to list only active courses")
+async def list_courses(interaction: discord.Interaction, value: Optional[Literal["active"]] = None):
+    await interaction.response.defer(thinking=True)
+    await handle_courses_list(interaction, value)
+
+@secretcourse_group.command(name="update", description="Force refresh all live messages")
+async def force_update(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True)
+    await handle_update_messages(interaction)
+
+@secretcourse_group.command(name="test", description="Test bot connectivity and file access")
+async def run_test(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_test(interaction)
+
+@debug_group.command(name="logstatus", description="Show log watcher status and file position")
+async def debug_logstatus(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_debug_logstatus(interaction)
+
+@debug_group.command(name="courses", description="Show all courses in database with expiry times")
+async def debug_courses(interaction: discord.Interaction):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_debug_courses(interaction)
+
+@toggle_group.command(name="summary", description="Toggle the season summary message")
+@app_commands.describe(value="on or off")
+@has_admin_role()
+async def toggle_summary(interaction: discord.Interaction, value: Literal["on", "off"]):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_toggle_message(interaction, "summary", value)
+
+@toggle_group.command(name="standings", description="Toggle the standings leaderboard message")
+@app_commands.describe(value="on or off")
+@has_admin_role()
+async def toggle_standings(interaction: discord.Interaction, value: Literal["on", "off"]):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_toggle_message(interaction, "standings", value)
+
+@toggle_group.command(name="grid", description="Toggle the course grid message")
+@app_commands.describe(value="on or off")
+@has_admin_role()
+async def toggle_grid(interaction: discord.Interaction, value: Literal["on", "off"]):
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    await handle_toggle_message(interaction, "grid", value)
+
+bot.tree.add_command(secretcourse_group)
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    """Handle slash command errors"""
+    if isinstance(error, app_commands.CheckFailure):
+        return  # has_admin_role already replied
     
-    else:
-        await interaction.response.send_message(
-            "❌ Available actions: `season`, `config`, `test`, `debug`, `leaderboard`, `courses`, `update`, `toggle`\n"
-            "Use `/secretcourse season info` to see current season status.",
-            ephemeral=True
-        )
+    logger.error("Slash command error: %s", error)
 
+@error_boundary("❌ An error occurred while getting season info.")
 async def handle_season_info(interaction: discord.Interaction):
     """Handle season info command"""
-    try:
-        season = await db_manager.get_active_season()
-        
-        if not season:
-            await interaction.response.send_message("❌ No active season found.", ephemeral=True)
-            return
-        
-        start_date = datetime.fromtimestamp(season['start_date']).strftime("%Y-%m-%d %H:%M:%S")
-        end_date = "Not set" if not season['end_date'] else datetime.fromtimestamp(season['end_date']).strftime("%Y-%m-%d %H:%M:%S")
-        
-        embed = discord.Embed(
-            title=f"🏆 Season {season['season_number']} Info",
-            color=discord.Color.blue()
-        )
-        
-        if season['title']:
-            embed.add_field(name="Title", value=season['title'], inline=False)
-        
-        embed.add_field(name="Started", value=start_date, inline=True)
-        embed.add_field(name="Status", value="🟢 Active", inline=True)
-        embed.add_field(name="End Date", value=end_date, inline=True)
-        
-        # Get course count
-        courses = await db_manager.get_active_courses(season['id'])
-        active_courses = [c for c in courses if not c['expired']]
-        expired_courses = [c for c in courses if c['expired']]
-        
-        embed.add_field(name="Courses", value=f"{len(active_courses)} active, {len(expired_courses)} expired", inline=False)
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in season info: {e}")
-        await interaction.response.send_message("❌ An error occurred while getting season info.", ephemeral=True)
+    # Season and course counts in a single query
+    season = await db_manager.get_season_info_bundle()
+    
+    if not season:
+        await interaction.followup.send(NO_ACTIVE_SEASON_MSG)
+        return
+    
+    # Discord renders <t:...> markup in each viewer's local time
+    start_date = f"<t:{season['start_date']}:f>"
+    end_date = "Not set" if not season['end_date'] else f"<t:{season['end_date']}:f>"
+    
+    fields = [
+        {"name": "Title", "value": season['title'], "inline": False},
+        {"name": "Started", "value": start_date, "inline": True},
+        {"name": "Status", "value": "🟢 Active", "inline": True},
+        {"name": "End Date", "value": end_date, "inline": True},
+        {"name": "Courses", "value": f"{season['active_courses']} active, {season['expired_courses']} expired", "inline": False},
+    ]
+    
+    embed = discord.Embed.from_dict({
+        "title": f"🏆 Season {season['season_number']} Info",
+        "color": discord.Color.blue().value,
+        "fields": [f for f in fields if f["value"]]
+    })
+    
+    await interaction.followup.send(embed=embed)
 
-@has_admin_role()
-async def handle_season_start(interaction: discord.Interaction, value: str):
+@error_boundary("❌ An error occurred while starting the season.")
+async def handle_season_start(interaction: discord.Interaction, season_number: int, title: Optional[str] = None):
     """Handle season start command"""
-    if not value:
-        await interaction.response.send_message("❌ Please provide a season number.", ephemeral=True)
+    # Check if season already exists
+    existing_season = await db_manager.get_active_season()
+    if existing_season and existing_season['season_number'] == season_number:
+        await interaction.followup.send(f"❌ Season {season_number} is already active.")
         return
     
-    try:
-        # Parse season number and optional title
-        parts = value.split(" ", 1)
-        season_number = int(parts[0])
-        title = parts[1] if len(parts) > 1 else None
-        
-        # Check if season already exists
-        existing_season = await db_manager.get_active_season()
-        if existing_season and existing_season['season_number'] == season_number:
-            await interaction.response.send_message(f"❌ Season {season_number} is already active.", ephemeral=True)
-            return
-        
-        # Create new season
-        season_id = await db_manager.create_season(season_number, title)
-        
-        embed = discord.Embed(
-            title=f"✅ Season {season_number} Started",
-            color=discord.Color.green()
-        )
-        
-        if title:
-            embed.add_field(name="Title", value=title, inline=False)
-        
-        embed.add_field(name="Season ID", value=str(season_id), inline=True)
-        embed.add_field(name="Started", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), inline=True)
-        
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"Season {season_number} started by {interaction.user}")
-        
-    except ValueError:
-        await interaction.response.send_message("❌ Invalid season number. Please provide a valid integer.", ephemeral=True)
-    except Exception as e:
-        logger.error(f"Error starting season: {e}")
-        await interaction.response.send_message("❌ An error occurred while starting the season.", ephemeral=True)
+    # Create new season
+    season_id = await db_manager.create_season(season_number, title)
+    
+    fields = [
+        {"name": "Title", "value": title, "inline": False},
+        {"name": "Season ID", "value": str(season_id), "inline": True},
+        {"name": "Started", "value": time.strftime("%Y-%m-%d %H:%M:%S"), "inline": True},
+    ]
+    
+    embed = discord.Embed.from_dict({
+        "title": f"✅ Season {season_number} Started",
+        "color": discord.Color.green().value,
+        "fields": [f for f in fields if f["value"]]
+    })
+    
+    await interaction.followup.send(embed=embed)
+    logger.info("Season %s started by %s", season_number, interaction.user)
 
-@has_admin_role()
+@error_boundary("❌ An error occurred.")
 async def handle_season_end(interaction: discord.Interaction):
     """Handle season end command"""
-    try:
-        season = await db_manager.get_active_season()
-        if not season:
-            await interaction.response.send_message("❌ No active season to end.", ephemeral=True)
-            return
-        
-        # Check if there are any active courses
-        courses = await db_manager.get_active_courses(season['id'])
-        active_courses = [c for c in courses if not c['expired']]
-        
-        # Create confirmation view
-        view = SeasonEndConfirmView(season, active_courses)
-        
-        if active_courses:
-            course_list = ", ".join([c['course_name'] for c in active_courses[:5]])
-            if len(active_courses) > 5:
-                course_list += f" (and {len(active_courses) - 5} more)"
-            
-            embed = discord.Embed(
-                title="⚠️ Confirm Season End",
-                description=f"Season {season['season_number']} still has {len(active_courses)} active courses:\n{course_list}\n\nAre you sure you want to end this season?",
-                color=discord.Color.orange()
-            )
-        else:
-            embed = discord.Embed(
-                title="🏁 End Season",
-                description=f"End Season {season['season_number']}?",
-                color=discord.Color.red()
-            )
-        
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-        
-    except Exception as e:
-        logger.error(f"Error in season end: {e}")
-        await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
-
-@has_admin_role()
-async def handle_config_channel(interaction: discord.Interaction, value: str):
-    """Handle config channel command"""
-    if not value:
-        await interaction.response.send_message("❌ Please provide a channel ID.", ephemeral=True)
+    season = await db_manager.get_active_season()
+    if not season:
+        await interaction.followup.send("❌ No active season to end.", ephemeral=True)
         return
     
-    try:
-        channel_id = int(value)
-        channel = bot.get_channel(channel_id)
-        
-        if not channel:
-            await interaction.response.send_message("❌ Channel not found.", ephemeral=True)
-            return
-        
-        config.set("announcement_channel_id", channel_id)
+    # Check if there are any active courses
+    active_courses, _ = await db_manager.get_active_courses_split(season['id'])
+    
+    # Create confirmation view
+    view = SeasonEndConfirmView(season, active_courses, interaction.user.id)
+    
+    if active_courses:
+        course_list = ", ".join([c['course_name'] for c in active_courses[:5]])
+        if len(active_courses) > 5:
+            course_list += f" (and {len(active_courses) - 5} more)"
         
         embed = discord.Embed(
-            title="✅ Channel Configuration Updated",
-            description=f"Announcement channel set to {channel.mention}",
-            color=discord.Color.green()
+            title="⚠️ Confirm Season End",
+            description=f"Season {season['season_number']} still has {len(active_courses)} active courses:\n{course_list}\n\nAre you sure you want to end this season?",
+            color=discord.Color.orange()
         )
-        
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"Announcement channel set to {channel.name} ({channel_id}) by {interaction.user}")
-        
-    except ValueError:
-        await interaction.response.send_message("❌ Invalid channel ID. Please provide a valid integer.", ephemeral=True)
-    except Exception as e:
-        logger.error(f"Error setting channel: {e}")
-        await interaction.response.send_message("❌ An error occurred while setting the channel.", ephemeral=True)
+    else:
+        embed = discord.Embed(
+            title="🏁 End Season",
+            description=f"End Season {season['season_number']}?",
+            color=discord.Color.red()
+        )
+    
+    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
 
-@has_admin_role()
+@error_boundary("❌ An error occurred while setting the channel.")
+async def handle_config_channel(interaction: discord.Interaction, channel: discord.TextChannel):
+    """Handle config channel command"""
+    config.set("announcement_channel_id", channel.id)
+    
+    embed = discord.Embed(
+        title="✅ Channel Configuration Updated",
+        description=f"Announcement channel set to {channel.mention}",
+        color=discord.Color.green()
+    )
+    
+    await interaction.followup.send(embed=embed)
+    logger.info("Announcement channel set to %s (%s) by %s", channel.name, channel.id, interaction.user)
+
+@error_boundary("❌ An error occurred while setting the log level.")
 async def handle_config_loglevel(interaction: discord.Interaction, value: str):
     """Handle config loglevel command"""
-    valid_levels = ["off", "minimal", "debug"]
+    level = value.lower() if value else ""
     
-    if not value or value.lower() not in valid_levels:
-        await interaction.response.send_message(
-            f"❌ Invalid log level. Valid options: {', '.join(valid_levels)}", 
+    if level not in LOG_LEVELS_SET:
+        await interaction.followup.send(
+            INVALID_LOG_LEVEL_MSG, 
             ephemeral=True
         )
         return
     
-    try:
-        config.set("log_level", value.lower())
-        
-        embed = discord.Embed(
-            title="✅ Log Level Updated",
-            description=f"Log level set to: `{value.lower()}`",
-            color=discord.Color.green()
-        )
-        
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"Log level set to {value} by {interaction.user}")
-        
-    except Exception as e:
-        logger.error(f"Error setting log level: {e}")
-        await interaction.response.send_message("❌ An error occurred while setting the log level.", ephemeral=True)
+    config.set("log_level", level)
+    
+    embed = discord.Embed(
+        title="✅ Log Level Updated",
+        description=f"Log level set to: `{level}`",
+        color=discord.Color.green()
+    )
+    
+    await interaction.followup.send(embed=embed)
+    logger.info("Log level set to %s by %s", value, interaction.user)
 
-@has_admin_role()
-async def handle_config_scoring(interaction: discord.Interaction, value: str):
+@error_boundary("❌ An error occurred.")
+async def handle_config_scoring(interaction: discord.Interaction, setting: Optional[str] = None, number: Optional[int] = None):
     """Handle config scoring command - set min_courses_required or best_courses_count"""
-    if not value:
+    if setting is None and number is None:
         # Show current settings
-        min_req = config.get("min_courses_required", 0)
-        best_count = config.get("best_courses_count", 0)
+        min_req = _Cfg.min_courses_required
+        best_count = _Cfg.best_courses_count
 
         embed = discord.Embed(
             title="📊 Scoring Configuration",
@@ -370,484 +528,418 @@ async def handle_config_scoring(interaction: discord.Interaction, value: str):
         )
         embed.add_field(
             name="Usage",
-            value="`/secretcourse config scoring min <number>`\n`/secretcourse config scoring best <number>`",
+            value="`/secretcourse config scoring setting:min number:<number>`\n`/secretcourse config scoring setting:best number:<number>`",
             inline=False
         )
 
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
         return
 
-    try:
-        parts = value.split()
-        if len(parts) != 2:
-            await interaction.response.send_message(
-                "❌ Usage: `scoring min <number>` or `scoring best <number>`",
-                ephemeral=True
-            )
-            return
-
-        setting_type, number = parts[0].lower(), int(parts[1])
-
-        if number < 0:
-            await interaction.response.send_message("❌ Value must be 0 or positive.", ephemeral=True)
-            return
-
-        if setting_type == "min":
-            config.set("min_courses_required", number)
-            desc = f"Minimum courses required set to `{number}`"
-            if number == 0:
-                desc += " (disabled)"
-        elif setting_type == "best":
-            config.set("best_courses_count", number)
-            desc = f"Best courses count set to `{number}`"
-            if number == 0:
-                desc += " (all courses count)"
-        else:
-            await interaction.response.send_message(
-                "❌ Unknown setting. Use `min` or `best`.",
-                ephemeral=True
-            )
-            return
-
-        embed = discord.Embed(
-            title="✅ Scoring Configuration Updated",
-            description=desc,
-            color=discord.Color.green()
+    if setting is None or number is None:
+        await interaction.followup.send(
+            SCORING_USAGE_MSG,
+            ephemeral=True
         )
+        return
 
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"Scoring config {setting_type} set to {number} by {interaction.user}")
+    setting_type = setting.lower()
 
-    except ValueError:
-        await interaction.response.send_message("❌ Invalid number.", ephemeral=True)
-    except Exception as e:
-        logger.error(f"Error setting scoring config: {e}")
-        await interaction.response.send_message("❌ An error occurred.", ephemeral=True)
+    if number < 0:
+        await interaction.followup.send("❌ Value must be 0 or positive.", ephemeral=True)
+        return
 
-async def handle_leaderboard(interaction: discord.Interaction, value: str = None):
-    """Handle leaderboard command"""
-    try:
-        # Parse season number if provided
-        season_number = None
-        if value:
-            try:
-                season_number = int(value)
-            except ValueError:
-                await interaction.response.send_message("❌ Invalid season number.", ephemeral=True)
-                return
-        
-        # Get season
-        if season_number:
-            season = await db_manager.get_season_by_number(season_number)
-            if not season:
-                await interaction.response.send_message(f"❌ Season {season_number} not found.", ephemeral=True)
-                return
-        else:
-            season = await db_manager.get_active_season()
-            if not season:
-                await interaction.response.send_message("❌ No active season found.", ephemeral=True)
-                return
-        
-        # Get leaderboard
-        leaderboard = await db_manager.get_season_leaderboard_with_projections(season['id'])
-        
-        embed = discord.Embed(
-            title=f"🏆 Season {season['season_number']} Leaderboard",
-            color=discord.Color.gold()
+    scoring_setting = SCORING_SETTINGS.get(setting_type)
+    if scoring_setting is None:
+        await interaction.followup.send(
+            "❌ Unknown setting. Use `min` or `best`.",
+            ephemeral=True
         )
-        
-        if season['title']:
-            embed.add_field(name="Title", value=season['title'], inline=False)
-        
-        status = "🟢 Active" if season.get('is_active') else "🔴 Ended"
-        embed.add_field(name="Status", value=status, inline=True)
-        
-        if not leaderboard:
-            embed.add_field(name="Leaderboard", value="No results yet", inline=False)
-        else:
-            # Show top 10
-            top_10 = leaderboard[:10]
-            leaderboard_text = []
-            
-            for player in top_10:
-                medal = "🥇" if player['position'] == 1 else "🥈" if player['position'] == 2 else "🥉" if player['position'] == 3 else f"{player['position']}."
-                leaderboard_text.append(f"{medal} {player['username']} - {player['total_points']} pts ({player['courses_completed']} courses)")
-            
-            embed.add_field(name="Top 10", value="\n".join(leaderboard_text), inline=False)
-            
-            if len(leaderboard) > 10:
-                embed.add_field(name="Total Players", value=str(len(leaderboard)), inline=True)
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in leaderboard command: {e}")
-        await interaction.response.send_message("❌ An error occurred while getting the leaderboard.", ephemeral=True)
-
-async def handle_courses_list(interaction: discord.Interaction, value: str = None):
-    """Handle courses list command"""
-    try:
-        active_only = value and value.lower() in ['true', 'active', 'yes', '1']
-        
-        season = await db_manager.get_active_season()
+        return
+    
+    config_key, label, zero_suffix = scoring_setting
+    config.set(config_key, number)
+    desc = f"{label} set to `{number}`"
+    if number == 0:
+        desc += zero_suffix
+
+    embed = discord.Embed(
+        title="✅ Scoring Configuration Updated",
+        description=desc,
+        color=discord.Color.green()
+    )
+
+    await interaction.followup.send(embed=embed)
+    logger.info("Scoring config %s set to %s by %s", setting_type, number, interaction.user)
+
+@error_boundary("❌ An error occurred while getting the leaderboard.")
+async def handle_leaderboard(interaction: discord.Interaction, season_number: Optional[int] = None):
+    """Handle leaderboard command"""
+    # Get season
+    if season_number:
+        season = await db_manager.get_season_by_number(season_number)
         if not season:
-            await interaction.response.send_message("❌ No active season found.", ephemeral=True)
+            await interaction.followup.send(f"❌ Season {season_number} not found.")
             return
-        
-        courses = await db_manager.get_active_courses(season['id'])
-        
-        if not courses:
-            await interaction.response.send_message("❌ No courses found for current season.", ephemeral=True)
+    else:
+        season = await db_manager.get_active_season()
+        if not season:
+            await interaction.followup.send(NO_ACTIVE_SEASON_MSG)
             return
+    
+    # Get leaderboard
+    leaderboard = await db_manager.get_season_leaderboard_with_projections(season['id'])
+    
+    status = "🟢 Active" if season.get('is_active') else "🔴 Ended"
+    fields = [
+        {"name": "Title", "value": season['title'], "inline": False},
+        {"name": "Status", "value": status, "inline": True},
+    ]
+    
+    if not leaderboard:
+        fields.append({"name": "Leaderboard", "value": "No results yet", "inline": False})
+    else:
+        # Show top 10
+        leaderboard_text = [
+            f"{rank_prefix(player['position'])} {player['username']} - {player['total_points']} pts ({player['courses_completed']} courses)"
+            for player in leaderboard[:10]
+        ]
         
-        active_courses = [c for c in courses if not c['expired']]
-        expired_courses = [c for c in courses if c['expired']]
-        
-        embed = discord.Embed(
-            title=f"📋 Season {season['season_number']} Courses",
-            color=discord.Color.blue()
-        )
-        
-        if season['title']:
-            embed.description = season['title']
+        fields.append({"name": "Top 10", "value": "\n".join(leaderboard_text), "inline": False})
         
-        # Active courses
-        if active_courses:
-            active_list = []
-            for course in sorted(active_courses, key=lambda x: x['secret_until']):
-                expiry = datetime.fromtimestamp(course['secret_until'])
-                now = datetime.now()
+        if len(leaderboard) > 10:
+            fields.append({"name": "Total Players", "value": str(len(leaderboard)), "inline": True})
+    
+    embed = discord.Embed.from_dict({
+        "title": f"🏆 Season {season['season_number']} Leaderboard",
+        "color": discord.Color.gold().value,
+        "fields": [f for f in fields if f["value"]]
+    })
+    
+    await interaction.followup.send(embed=embed)
+
+@error_boundary("❌ An error occurred while getting courses.")
+async def handle_courses_list(interaction: discord.Interaction, value: str = None):
+    """Handle courses list command"""
+    active_only = bool(value) and value.lower() in ACTIVE_FILTERS
+    
+    season = await db_manager.get_active_season()
+    if not season:
+        await interaction.followup.send(NO_ACTIVE_SEASON_MSG)
+        return
+    
+    active_courses, expired_courses = await db_manager.get_active_courses_split(season['id'])
+    
+    if not active_courses and not expired_courses:
+        await interaction.followup.send("❌ No courses found for current season.")
+        return
+    
+    fields = []
+    
+    # Active courses
+    if active_courses:
+        active_list = []
+        now_ts = time.time()
+        for course in active_courses:  # already ordered by expiry
+            # Calculate time remaining
+            remaining = course['secret_until'] - now_ts
+            if remaining > 0:
+                days, rem = divmod(int(remaining), 86400)
+                hours, rem = divmod(rem, 3600)
+                minutes = rem // 60
                 
-                # Calculate time remaining
-                time_diff = expiry - now
-                if time_diff.total_seconds() > 0:
-                    days = time_diff.days
-                    hours = time_diff.seconds // 3600
-                    minutes = (time_diff.seconds % 3600) // 60
-                    
-                    time_str = []
-                    if days > 0:
-                        time_str.append(f"{days}d")
-                    if hours > 0:
-                        time_str.append(f"{hours}h")
-                    if minutes > 0:
-                        time_str.append(f"{minutes}m")
-                    
-                    time_remaining = " ".join(time_str) if time_str else "< 1m"
-                    active_list.append(f"🟢 {course['course_name']} - expires in {time_remaining}")
-                else:
-                    active_list.append(f"🔴 {course['course_name']} - EXPIRED")
-            
-            embed.add_field(
-                name=f"Active Courses ({len(active_courses)})",
-                value="\n".join(active_list) if active_list else "None",
-                inline=False
-            )
-        
-        # Expired courses (unless active_only is specified)
-        if expired_courses and not active_only:
-            expired_list = []
-            for course in sorted(expired_courses, key=lambda x: x['secret_until'], reverse=True)[:10]:
-                standings_count = len(course['final_standings']['standings']) if course['final_standings'] else 0
-                expired_list.append(f"⚫ {course['course_name']} - {standings_count} results")
-            
-            embed.add_field(
-                name=f"Expired Courses ({len(expired_courses)})",
-                value="\n".join(expired_list),
-                inline=False
-            )
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in courses command: {e}")
-        await interaction.response.send_message("❌ An error occurred while getting courses.", ephemeral=True)
+                time_str = []
+                if days > 0:
+                    time_str.append(f"{days}d")
+                if hours > 0:
+                    time_str.append(f"{hours}h")
+                if minutes > 0:
+                    time_str.append(f"{minutes}m")
+                
+                time_remaining = " ".join(time_str) if time_str else "< 1m"
+                active_list.append(f"🟢 {course['course_name']} - expires in {time_remaining}")
+            else:
+                active_list.append(f"🔴 {course['course_name']} - EXPIRED")
+        
+        fields.append({
+            "name": f"Active Courses ({len(active_courses)})",
+            "value": "\n".join(active_list) if active_list else "None",
+            "inline": False
+        })
+    
+    # Expired courses (unless active_only is specified)
+    if expired_courses and not active_only:
+        expired_list = [
+            f"⚫ {course['course_name']} - {course['standings_count']} results"
+            for course in reversed(expired_courses[-10:])  # 10 most recently expired
+        ]
+        
+        fields.append({
+            "name": f"Expired Courses ({len(expired_courses)})",
+            "value": "\n".join(expired_list),
+            "inline": False
+        })
+    
+    embed = discord.Embed.from_dict({
+        "title": f"📋 Season {season['season_number']} Courses",
+        "description": season['title'] or None,
+        "color": discord.Color.blue().value,
+        "fields": fields
+    })
+    
+    await interaction.followup.send(embed=embed)
 
+@error_boundary("❌ Test failed. Check logs for details.")
 async def handle_test(interaction: discord.Interaction):
     """Handle test command - for development purposes"""
-    try:
-        season = await db_manager.get_active_season()
-        
-        embed = discord.Embed(
-            title="🧪 Bot Test Results",
-            color=discord.Color.blue()
-        )
-        
-        embed.add_field(name="Database", value="✅ Connected", inline=True)
-        embed.add_field(name="Configuration", value="✅ Loaded", inline=True)
-        embed.add_field(name="Active Season", value=f"Season {season['season_number']}" if season else "None", inline=True)
-        
-        # Test database paths
-        import os
-        main_db_exists = os.path.exists(config.get("main_db_path"))
-        log_file_exists = os.path.exists(config.get("log_file_path"))
-        
-        embed.add_field(name="Main DB Access", value="✅ Found" if main_db_exists else "❌ Not Found", inline=True)
-        embed.add_field(name="Log File Access", value="✅ Found" if log_file_exists else "❌ Not Found", inline=True)
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in test command: {e}")
-        await interaction.response.send_message("❌ Test failed. Check logs for details.", ephemeral=True)
-
-@bot.event
-async def on_command_error(ctx, error):
-    """Handle command errors"""
-    if isinstance(error, commands.CommandNotFound):
-        return  # Ignore unknown commands
     
-    logger.error(f"Command error: {error}")
+    # Season lookup and path checks are independent, so run them together
+    season, main_db_stat, log_file_stat = await asyncio.gather(
+        db_manager.get_active_season(),
+        _astat(_MAIN_DB_PATH),
+        _astat(_LOG_FILE_PATH)
+    )
+    
+    embed = discord.Embed.from_dict({
+        "title": "🧪 Bot Test Results",
+        "color": discord.Color.blue().value,
+        "fields": [
+            {"name": "Database", "value": "✅ Connected", "inline": True},
+            {"name": "Configuration", "value": "✅ Loaded", "inline": True},
+            {"name": "Active Season", "value": f"Season {season['season_number']}" if season else "None", "inline": True},
+            {"name": "Main DB Access", "value": "✅ Found" if main_db_stat else "❌ Not Found", "inline": True},
+            {"name": "Log File Access", "value": "✅ Found" if log_file_stat else "❌ Not Found", "inline": True},
+        ]
+    })
+    
+    await interaction.followup.send(embed=embed)
 
-@has_admin_role()
+@error_boundary("❌ An error occurred while configuring messages.")
 async def handle_config_messages(interaction: discord.Interaction, value: str):
     """Handle config messages command to toggle live messages"""
-    if not value or value.lower() not in ['on', 'off', 'enable', 'disable', 'true', 'false']:
-        await interaction.response.send_message(
-            "❌ Usage: `/secretcourse config messages <on|off>`", 
+    enable = _parse_switch(value, MESSAGES_ON, MESSAGES_OFF)
+    if enable is None:
+        await interaction.followup.send(
+            MESSAGES_USAGE_MSG, 
             ephemeral=True
         )
         return
     
-    try:
-        enable = value.lower() in ['on', 'enable', 'true']
-        config.set("live_messages_enabled", enable)
-        
-        if enable:
-            if not config.get("announcement_channel_id"):
-                await interaction.response.send_message(
-                    "⚠️ Live messages enabled but no announcement channel set. Use `/secretcourse config channel` first.",
-                    ephemeral=True
-                )
-                return
-            
-            await message_manager.start_live_updates()
-            status = "✅ Live messages enabled and started"
-        else:
-            await message_manager.stop_live_updates()
-            status = "🔴 Live messages disabled and stopped"
-        
-        embed = discord.Embed(
-            title="🔧 Message Configuration Updated",
-            description=status,
-            color=discord.Color.green() if enable else discord.Color.red()
+    if enable == _Cfg.live_messages_enabled == message_manager.running:
+        await interaction.followup.send(
+            f"ℹ️ Live messages are already {'enabled' if enable else 'disabled'}.",
+            ephemeral=True
         )
+        return
+    
+    config.set("live_messages_enabled", enable)
+    
+    if enable:
+        if not _Cfg.announcement_channel_id:
+            await interaction.followup.send(
+                "⚠️ Live messages enabled but no announcement channel set. Use `/secretcourse config channel` first.",
+                ephemeral=True
+            )
+            return
         
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"Live messages {'enabled' if enable else 'disabled'} by {interaction.user}")
-        
-    except Exception as e:
-        logger.error(f"Error configuring messages: {e}")
-        await interaction.response.send_message("❌ An error occurred while configuring messages.", ephemeral=True)
+        await message_manager.start_live_updates()
+        status = "✅ Live messages enabled and started"
+    else:
+        await message_manager.stop_live_updates()
+        status = "🔴 Live messages disabled and stopped"
+    
+    embed = discord.Embed(
+        title="🔧 Message Configuration Updated",
+        description=status,
+        color=discord.Color.green() if enable else discord.Color.red()
+    )
+    
+    await interaction.followup.send(embed=embed)
+    logger.info("Live messages %s by %s", 'enabled' if enable else 'disabled', interaction.user)
 
+@error_boundary("❌ An error occurred while updating messages.")
 async def handle_update_messages(interaction: discord.Interaction):
     """Handle manual message update command"""
-    try:
-        if not config.get("announcement_channel_id"):
-            await interaction.response.send_message("❌ No announcement channel configured.", ephemeral=True)
-            return
-        
-        success = await message_manager.force_update()
-        
-        if success:
-            embed = discord.Embed(
-                title="✅ Messages Updated",
-                description="All live messages have been updated manually.",
-                color=discord.Color.green()
-            )
-        else:
-            embed = discord.Embed(
-                title="❌ Update Failed", 
-                description="Error occurred while updating messages. Check logs.",
-                color=discord.Color.red()
-            )
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in manual update: {e}")
-        await interaction.response.send_message("❌ An error occurred while updating messages.", ephemeral=True)
+    if not _Cfg.announcement_channel_id:
+        await interaction.followup.send("❌ No announcement channel configured.")
+        return
+    
+    success = await message_manager.force_update()
+    
+    if success:
+        embed = discord.Embed(
+            title="✅ Messages Updated",
+            description="All live messages have been updated manually.",
+            color=discord.Color.green()
+        )
+    else:
+        embed = discord.Embed(
+            title="❌ Update Failed", 
+            description="Error occurred while updating messages. Check logs.",
+            color=discord.Color.red()
+        )
+    
+    await interaction.followup.send(embed=embed)
 
-@has_admin_role()
+@error_boundary("❌ Error updating toggle.")
 async def handle_toggle_message(interaction: discord.Interaction, message_type: str, value: str):
     """Handle message type toggles"""
-    if not value or value.lower() not in ['on', 'off', 'true', 'false']:
-        await interaction.response.send_message(f"❌ Usage: `/secretcourse toggle {message_type} <on|off>`", ephemeral=True)
+    enable = _parse_switch(value, TOGGLE_ON, TOGGLE_OFF)
+    if enable is None:
+        await interaction.followup.send(TOGGLE_USAGE_MSGS[message_type], ephemeral=True)
         return
     
-    try:
-        enable = value.lower() in ['on', 'true']
-        
-        # Map command names to config keys
-        type_map = {
-            "summary": "season_summary",
-            "standings": "season_standings", 
-            "grid": "course_grid"
-        }
-        
-        config_key = type_map[message_type]
-        toggles = config.get("message_toggles", {})
-        toggles[config_key] = enable
-        config.set("message_toggles", toggles)
-        
-        status = "enabled" if enable else "disabled"
-        embed = discord.Embed(
-            title="🔧 Message Toggle Updated",
-            description=f"{message_type.title()} messages {status}",
-            color=discord.Color.green() if enable else discord.Color.red()
-        )
-        
-        await interaction.response.send_message(embed=embed)
-        logger.info(f"{message_type} messages {status} by {interaction.user}")
-        
-    except Exception as e:
-        logger.error(f"Error toggling {message_type}: {e}")
-        await interaction.response.send_message("❌ Error updating toggle.", ephemeral=True)
+    config_key = TOGGLE_CONFIG_KEYS[message_type]
+    toggles = config.get("message_toggles", {})
+    toggles[config_key] = enable
+    config.set("message_toggles", toggles)
+    
+    status = "enabled" if enable else "disabled"
+    embed = discord.Embed(
+        title="🔧 Message Toggle Updated",
+        description=f"{message_type.title()} messages {status}",
+        color=discord.Color.green() if enable else discord.Color.red()
+    )
+    
+    await interaction.followup.send(embed=embed)
+    logger.info("%s messages %s by %s", message_type, status, interaction.user)
 
+@error_boundary("❌ Error getting log status.")
 async def handle_debug_logstatus(interaction: discord.Interaction):
     """Handle debug logstatus command - shows log monitoring status"""
-    try:
-        embed = discord.Embed(
-            title="🔍 Log Monitoring Status",
-            color=discord.Color.blue()
-        )
-        
-        # Log watcher status
-        status = "🟢 Running" if log_watcher.running else "🔴 Stopped"
-        embed.add_field(name="Log Watcher", value=status, inline=True)
-        
-        # File info
-        import os
-        log_path = config.get("log_file_path")
-        if os.path.exists(log_path):
-            file_size = os.path.getsize(log_path)
-            file_size_mb = round(file_size / 1024 / 1024, 2)
-            embed.add_field(name="Log File Size", value=f"{file_size_mb} MB", inline=True)
-        else:
-            embed.add_field(name="Log File", value="❌ Not Found", inline=True)
-        
-        # Last position
-        embed.add_field(name="Last Position", value=f"{log_watcher.last_position} bytes", inline=True)
-        
-        # Position file status
-        pos_file_exists = os.path.exists(log_watcher.position_file)
-        pos_status = "✅ Exists" if pos_file_exists else "❌ Missing"
-        embed.add_field(name="Position File", value=pos_status, inline=True)
-        
-        await interaction.response.send_message(embed=embed)
-        
-    except Exception as e:
-        logger.error(f"Error in debug logstatus: {e}")
-        await interaction.response.send_message("❌ Error getting log status.", ephemeral=True)
+    # File info - one stat per file, off the event loop
+    log_stat, pos_stat = await asyncio.gather(
+        _astat(_LOG_FILE_PATH),
+        _astat(log_watcher.position_file)
+    )
+    
+    if log_stat:
+        log_field = {"name": "Log File Size", "value": f"{round(log_stat.st_size / 1024 / 1024, 2)} MB", "inline": True}
+    else:
+        log_field = {"name": "Log File", "value": "❌ Not Found", "inline": True}
+    
+    embed = discord.Embed.from_dict({
+        "title": "🔍 Log Monitoring Status",
+        "color": discord.Color.blue().value,
+        "fields": [
+            {"name": "Log Watcher", "value": "🟢 Running" if log_watcher.running else "🔴 Stopped", "inline": True},
+            log_field,
+            {"name": "Last Position", "value": f"{log_watcher.last_position} bytes", "inline": True},
+            {"name": "Position File", "value": "✅ Exists" if pos_stat else "❌ Missing", "inline": True},
+        ]
+    })
+    
+    await interaction.followup.send(embed=embed)
 
+@error_boundary("❌ Error getting courses.")
 async def handle_debug_courses(interaction: discord.Interaction):
     """Handle debug courses command - shows current courses in database"""
-    try:
-        season = await db_manager.get_active_season()
-        if not season:
-            await interaction.response.send_message("❌ No active season found.", ephemeral=True)
-            return
-        
-        courses = await db_manager.get_active_courses(season['id'])
-        
-        embed = discord.Embed(
-            title=f"📋 Season {season['season_number']} Courses",
-            color=discord.Color.blue()
-        )
-        
-        if not courses:
-            embed.add_field(name="Courses", value="No courses found", inline=False)
-        else:
-            active_courses = [c for c in courses if not c['expired']]
-            expired_courses = [c for c in courses if c['expired']]
-            
-            if active_courses:
-                active_list = []
-                for course in active_courses:
-                    # expiry = datetime.fromtimestamp(course['secret_until']).strftime("%m-%d %H:%M")
-                    expiry = f"<t:{str(course['secret_until'])}>"
-                    active_list.append(f"• {course['course_name']} (expires {expiry})")
-                
-                embed.add_field(
-                    name=f"🟢 Active Courses ({len(active_courses)})",
-                    value="\n".join(active_list),
-                    inline=False
-                )
+    season = await db_manager.get_active_season()
+    if not season:
+        await interaction.followup.send(NO_ACTIVE_SEASON_MSG, ephemeral=True)
+        return
+    
+    active_courses, expired_courses = await db_manager.get_active_courses_split(season['id'])
+    
+    embed = discord.Embed(
+        title=f"📋 Season {season['season_number']} Courses",
+        color=discord.Color.blue()
+    )
+    
+    if not active_courses and not expired_courses:
+        embed.add_field(name="Courses", value="No courses found", inline=False)
+    else:
+        if active_courses:
+            active_list = [
+                f"• {course['course_name']} (expires <t:{course['secret_until']}>)"
+                for course in active_courses
+            ]
             
-            if expired_courses:
-                expired_list = []
-                for course in expired_courses:
-                    standings_count = len(course['final_standings']['standings']) if course['final_standings'] else 0
-                    expired_list.append(f"• {course['course_name']} ({standings_count} results)")
-                
-                embed.add_field(
-                    name=f"🔴 Expired Courses ({len(expired_courses)})", 
-                    value="\n".join(expired_list), 
-                    inline=False
-                )
-        
-        await interaction.response.send_message(embed=embed)
+            embed.add_field(
+                name=f"🟢 Active Courses ({len(active_courses)})",
+                value="\n".join(active_list),
+                inline=False
+            )
         
-    except Exception as e:
-        logger.error(f"Error in debug courses: {e}")
-        await interaction.response.send_message("❌ Error getting courses.", ephemeral=True)
+        if expired_courses:
+            expired_list = [
+                f"• {course['course_name']} ({course['standings_count']} results)"
+                for course in expired_courses
+            ]
+            
+            embed.add_field(
+                name=f"🔴 Expired Courses ({len(expired_courses)})", 
+                value="\n".join(expired_list), 
+                inline=False
+            )
+    
+    await interaction.followup.send(embed=embed)
 
 class SeasonEndConfirmView(discord.ui.View):
     """Confirmation view for ending seasons"""
     
-    def __init__(self, season: Dict, active_courses: List[Dict]):
+    def __init__(self, season: Dict, active_courses: List[Dict], owner_id: int):
         super().__init__(timeout=300)
         self.season = season
+        self.owner_id = owner_id
         self.active_courses = active_courses
+        self._start_str = _fmt_ts(season['start_date'], '%Y-%m-%d')
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only the admin who ran the command can press the buttons"""
+        if interaction.user.id == self.owner_id:
+            return True
+        
+        await interaction.response.send_message("❌ Only the user who ran this command can confirm it.", ephemeral=True)
+        return False
     
     @discord.ui.button(label="End Season", style=discord.ButtonStyle.red, emoji="🏁")
     async def confirm_end(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # End the season - the only step whose failure should abort
         try:
-            # End the season
             await db_manager.end_season(self.season['id'])
-            
-            # Stop live updates
-            await message_manager.stop_live_updates()
-            
-            # Get final leaderboard
-            leaderboard = await db_manager.get_season_leaderboard(self.season['id'])
-            
-            embed = discord.Embed(
-                title=f"🏁 Season {self.season['season_number']} Ended",
-                color=discord.Color.red()
-            )
-            
-            if self.season['title']:
-                embed.add_field(name="Title", value=self.season['title'], inline=False)
-            
+        except Exception as e:
+            logger.error("Error ending season: %s", e)
+            await interaction.response.send_message("❌ Error ending season.", ephemeral=True)
+            return
+        
+        # Stop live updates
+        await message_manager.stop_live_updates()
+        
+        # Get final leaderboard
+        leaderboard = await db_manager.get_season_leaderboard(self.season['id'])
+        
+        embed = discord.Embed(
+            title=f"🏁 Season {self.season['season_number']} Ended",
+            color=discord.Color.red()
+        )
+        
+        if self.season['title']:
+            embed.add_field(name="Title", value=self.season['title'], inline=False)
+        
+        embed.add_field(
+            name="Duration", 
+            value=f"{self._start_str} - {time.strftime('%Y-%m-%d')}", 
+            inline=False
+        )
+        
+        if leaderboard:
+            champion = leaderboard[0]
             embed.add_field(
-                name="Duration", 
-                value=f"{datetime.fromtimestamp(self.season['start_date']).strftime('%Y-%m-%d')} - {datetime.now().strftime('%Y-%m-%d')}", 
+                name="🏆 Season Champion", 
+                value=f"{champion['username']} - {champion['total_points']} points", 
                 inline=False
             )
             
-            if leaderboard:
-                champion = leaderboard[0]
-                embed.add_field(
-                    name="🏆 Season Champion", 
-                    value=f"{champion['username']} - {champion['total_points']} points", 
-                    inline=False
-                )
-                
-                if len(leaderboard) > 1:
-                    top_5 = leaderboard[:5]
-                    top_5_str = "\n".join([f"{p['position']}. {p['username']} - {p['total_points']} pts" for p in top_5])
-                    embed.add_field(name="Final Top 5", value=top_5_str, inline=False)
-            
-            # Clear the view
-            self.clear_items()
-            await interaction.response.edit_message(embed=embed, view=self)
-            
-            logger.info(f"Season {self.season['season_number']} ended by {interaction.user}")
-            
-        except Exception as e:
-            logger.error(f"Error ending season: {e}")
-            await interaction.response.send_message("❌ Error ending season.", ephemeral=True)
+            if len(leaderboard) > 1:
+                top_5 = leaderboard[:5]
+                top_5_str = "\n".join([f"{p['position']}. {p['username']} - {p['total_points']} pts" for p in top_5])
+                embed.add_field(name="Final Top 5", value=top_5_str, inline=False)
+        
+        # Clear the view
+        self.clear_items()
+        await interaction.response.edit_message(embed=embed, view=self)
+        
+        logger.info("Season %s ended by %s", self.season['season_number'], interaction.user)
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.gray, emoji="❌")
     async def cancel_end(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -867,29 +959,38 @@ class SeasonEndConfirmView(discord.ui.View):
 
 async def main():
     """Main bot startup function"""
-    token = config.get("discord_token")
+    token = _Cfg.discord_token
     
     if not token:
         logger.error("No Discord token found in configuration. Please add your bot token to config.json")
         return
     
+    logger.info("Event loop: %s", type(asyncio.get_running_loop()).__module__)
+    
     try:
         await bot.start(token)
     except discord.LoginFailure:
         logger.error("Invalid Discord token. Please check your token in config.json")
     except Exception as e:
-        logger.error(f"An error occurred while starting the bot: {e}")
+        logger.error("An error occurred while starting the bot: %s", e)
     finally:
+        await scheduler.stop()
+        await log_watcher.stop_monitoring()
         if not bot.is_closed():
             await bot.close()
+        await db_manager.close()
+        config.flush()
 
 if __name__ == "__main__":
     """Entry point for the bot"""
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot shutdown requested by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
     finally:
         logger.info("Bot shutdown complete")
\ No newline at end of file
@@ -2,16 +2,26 @@
 Configuration management for SecretCourse Discord Bot
 """
 import os
+import asyncio
 import json
 import logging
+import logging.handlers
+import queue
+import atexit
 from pathlib import Path
 
+# Seconds to wait after a config.set before writing the file, so a burst of
+# changes is written once
+SAVE_DELAY = 1.0
+
 class Config:
     """Configuration manager for the bot"""
     
     def __init__(self, config_path: str = "config.json"):
         self.config_path = config_path
         self.config = {}
+        self._listeners = []
+        self._save_handle = None
         self.load_config()
     
     def load_config(self):
@@ -27,6 +37,7 @@ class Config:
             "announcement_channel_id": None,
             "show_times_expired": True,
             "courses_per_row": 2,
+            "ping_everyone_on_expire": False,
             "message_toggles": {
                 "season_summary": True,
                 "season_standings": True, 
@@ -38,16 +49,22 @@ class Config:
             "top_players_count": 5,
             "min_courses_required": 0,  # 0 = disabled (no minimum participation requirement)
             "best_courses_count": 0,    # 0 = all courses count toward score
+            "dev_guild_id": None,       # sync slash commands to this guild only (instant propagation)
+            "synced_commands_hash": None,  # hash of the command tree last synced globally
         }
         
         try:
+            loaded_config = None
             if os.path.exists(self.config_path):
                 with open(self.config_path, 'r') as f:
-                    loaded_config = json.load(f)
-                    default_config.update(loaded_config)
+                    loaded_config = json.loads(f.read())
+                default_config.update(loaded_config)
             
             self.config = default_config
-            self.save_config()
+            
+            # Only rewrite the file if it's missing or lacks new default keys
+            if loaded_config != self.config:
+                self.save_config()
             
         except Exception as e:
             print(f"Error loading config: {e}")
@@ -68,8 +85,35 @@ class Config:
     def set(self, key: str, value):
         """Set configuration value"""
         self.config[key] = value
+        self._schedule_save()
+        
+        for listener in self._listeners:
+            listener()
+    
+    def _schedule_save(self):
+        """Write the file shortly after a change (immediately outside an event loop)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_config()
+            return
+        
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(SAVE_DELAY, self.flush)
+    
+    def flush(self):
+        """Write any pending changes to the file now"""
+        if self._save_handle is None:
+            return
+        
+        self._save_handle.cancel()
+        self._save_handle = None
         self.save_config()
     
+    def subscribe(self, listener):
+        """Register a callback run after every config.set"""
+        self._listeners.append(listener)
+    
     def setup_logging(self):
         """Setup logging based on configuration"""
         log_level_map = {
@@ -83,24 +127,31 @@ class Config:
         # Create logs directory if it doesn't exist
         Path("logs").mkdir(exist_ok=True)
         
-        # Configure logging
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('logs/bot.log'),
-                logging.StreamHandler()  # Also log to console
-            ]
-        )
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         
-        # Setup separate error log
+        file_handler = logging.FileHandler('logs/bot.log')
+        stream_handler = logging.StreamHandler()  # Also log to console
+        
+        # Separate error log
         error_handler = logging.FileHandler('logs/error.log')
         error_handler.setLevel(logging.ERROR)
-        error_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        error_handler.setFormatter(error_formatter)
         
-        # Add error handler to root logger
-        logging.getLogger().addHandler(error_handler)
+        for handler in (file_handler, stream_handler, error_handler):
+            handler.setFormatter(formatter)
+        
+        # Loggers only enqueue records; the file/console writes happen on the
+        # listener's background thread so they never block the event loop
+        log_queue = queue.Queue(-1)
+        root_logger = logging.getLogger()
+        root_logger.setLevel(log_level)
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        self._log_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, stream_handler, error_handler,
+            respect_handler_level=True
+        )
+        self._log_listener.start()
+        atexit.register(self._log_listener.stop)
 
 # Global config instance
 config = Config()
\ No newline at end of file
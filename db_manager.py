@@ -2,152 +2,413 @@
 Database manager for SecretCourse Discord Bot
 Handles both bot's own database and reading from main TaystJK database
 """
+import asyncio
+import functools
+import time
 import aiosqlite
 import sqlite3
 import logging
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from config import config
 
+try:
+    import orjson  # Optional: faster JSON for stored standings and log events
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+    
+    def json_dumps(obj) -> str:
+        # Stored as TEXT so SQLite's JSON functions can still read it
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 logger = logging.getLogger(__name__)
 
+# Connection tuning for the bot database. journal_mode=WAL persists in the
+# database file; the remaining pragmas apply per connection.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=memory",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Read-only connections can't change the journal mode, only tune themselves
+READER_PRAGMAS = (
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=memory",
+    "PRAGMA mmap_size=67108864",
+)
+
+# WAL lets these readers run alongside the single writer connection
+READER_POOL_SIZE = 4
+
+# Read-only connections kept open to the main TaystJK database
+MAIN_DB_POOL_SIZE = 2
+
+# sqlite3 keeps an LRU cache of prepared statements per connection; with the
+# connections kept open, repeated queries only bind parameters and execute
+STATEMENT_CACHE_SIZE = 256
+
+# The active season changes at most once per season; the TTL bounds staleness
+# if the database is changed outside the bot
+ACTIVE_SEASON_TTL = 30
+
+# Live standings change at human speed; renders within this many seconds
+# share one main database query per course
+STANDINGS_TTL = 30
+
+# Formula 1 style points indexed by finishing position (index 0 unused);
+# positions past the end of the table score nothing
+POINTS_TABLE = (0, 30, 25, 21, 18, 16, 14, 12, 10, 8, 6) + (4,) * 5 + (3,) * 5 + (2,) * 5 + (1,) * 5
+
+# Bot database schema, applied in one executescript call (single transaction)
+BOT_SCHEMA = """
+BEGIN;
+
+-- Seasons table
+CREATE TABLE IF NOT EXISTS seasons (
+    id INTEGER PRIMARY KEY,
+    season_number INTEGER UNIQUE,
+    title TEXT,
+    start_date INTEGER,
+    end_date INTEGER,
+    is_active BOOLEAN DEFAULT FALSE
+);
+
+-- Season courses table
+CREATE TABLE IF NOT EXISTS season_courses (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER,
+    course_name TEXT,
+    full_course_name TEXT UNIQUE,
+    secret_until INTEGER,
+    expired BOOLEAN DEFAULT FALSE,
+    final_standings TEXT,
+    FOREIGN KEY (season_id) REFERENCES seasons (id)
+);
+
+-- Player scores table
+CREATE TABLE IF NOT EXISTS player_scores (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER,
+    player_name TEXT,
+    total_points INTEGER DEFAULT 0,
+    courses_completed INTEGER DEFAULT 0,
+    FOREIGN KEY (season_id) REFERENCES seasons (id),
+    UNIQUE(season_id, player_name)
+);
+
+-- Course results table
+CREATE TABLE IF NOT EXISTS course_results (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER,
+    course_name TEXT,
+    player_name TEXT,
+    position INTEGER,
+    points INTEGER,
+    duration_ms INTEGER,
+    time_str TEXT,
+    FOREIGN KEY (season_id) REFERENCES seasons (id)
+);
+
+-- Bot messages table for Discord message tracking
+CREATE TABLE IF NOT EXISTS bot_messages (
+    id INTEGER PRIMARY KEY,
+    message_type TEXT,
+    channel_id INTEGER,
+    message_id INTEGER,
+    season_id INTEGER,
+    created_at INTEGER
+);
+
+-- Lets active/expired course lookups seek straight to their partition
+CREATE INDEX IF NOT EXISTS idx_season_courses_season_expired
+ON season_courses (season_id, expired);
+
+-- Serves per-season course lists already in expiry order
+CREATE INDEX IF NOT EXISTS idx_season_courses_season_until
+ON season_courses (season_id, secret_until);
+
+-- Covers the leaderboard query (no table lookups needed)
+CREATE INDEX IF NOT EXISTS idx_course_results_season_player
+ON course_results (season_id, player_name, points DESC);
+
+-- At most one row is active; the partial index holds just that row
+CREATE INDEX IF NOT EXISTS idx_seasons_active
+ON seasons (is_active) WHERE is_active = TRUE;
+
+-- Per-season message lookups and deletes by type
+CREATE INDEX IF NOT EXISTS idx_bot_messages_season_type
+ON bot_messages (season_id, message_type);
+
+COMMIT;
+"""
+
+# One result per player per course; created outside BOT_SCHEMA because older
+# databases may need duplicate rows removed first
+COURSE_RESULTS_UNIQUE_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_course_results_unique
+ON course_results (season_id, course_name, player_name)
+"""
+
+@functools.lru_cache(maxsize=512)
+def parse_course_name(full_course_name: str) -> str:
+    """Extract the short course name, e.g. "racearena_pro (dash1)" -> "dash1" """
+    head, paren, rest = full_course_name.partition('(')
+    return rest.partition(')')[0] if paren else full_course_name
+
+class ConnectionPool:
+    """Bounded pool of reusable read-only aiosqlite connections"""
+    
+    def __init__(self, db_path: str, size: int, pragmas: Tuple[str, ...] = ()):
+        self.db_path = db_path
+        self.size = size
+        self.pragmas = pragmas
+        self.connections: List[aiosqlite.Connection] = []
+        self._idle: List[aiosqlite.Connection] = []
+        self._slots = asyncio.Semaphore(size)
+    
+    async def _open(self) -> aiosqlite.Connection:
+        """Open a new read-only connection and apply the pool's pragmas"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        db = await aiosqlite.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in self.pragmas:
+            await db.execute(pragma)
+        self.connections.append(db)
+        logger.debug("Opened connection %s/%s to %s", len(self.connections), self.size, self.db_path)
+        return db
+    
+    @asynccontextmanager
+    async def connection(self):
+        """Yield a free connection, opening one lazily if none is idle"""
+        async with self._slots:
+            db = self._idle.pop() if self._idle else await self._open()
+            try:
+                yield db
+            finally:
+                self._idle.append(db)
+    
+    async def close(self):
+        """Close every connection opened by the pool"""
+        for db in self.connections:
+            await db.close()
+        self.connections.clear()
+        self._idle.clear()
+
 class DatabaseManager:
     """Manages all database operations for the bot"""
     
     def __init__(self):
         self.bot_db_path = config.get("bot_db_path")
         self.main_db_path = config.get("main_db_path")
+        
+        # One writer connection, serialized so transactions never interleave
+        self.writer_conn: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+        
+        # Read-only pools for the bot database and the main TaystJK database
+        self.reader_pool = ConnectionPool(self.bot_db_path, READER_POOL_SIZE, READER_PRAGMAS)
+        self.main_db_pool = ConnectionPool(self.main_db_path, MAIN_DB_POOL_SIZE, READER_PRAGMAS)
+        
+        # Cached result of get_active_season, cleared by create_season/end_season
+        self._active_season_cache: Optional[Dict] = None
+        self._active_season_expires = 0.0
+        self._active_season_lock = asyncio.Lock()
+        
+        # course name -> (expires_at, standings) for get_current_standings
+        self._standings_cache: Dict[str, Tuple[float, List[Dict]]] = {}
+    
+    def invalidate_active_season(self):
+        """Drop the cached active season so the next lookup queries the database"""
+        self._active_season_cache = None
+        self._active_season_expires = 0.0
+    
+    async def _get_writer(self) -> aiosqlite.Connection:
+        """Get the writer connection, opening it on first use"""
+        if self.writer_conn is None:
+            # Autocommit mode: _write() opens each transaction explicitly
+            self.writer_conn = await aiosqlite.connect(
+                self.bot_db_path, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE
+            )
+            for pragma in SQLITE_PRAGMAS:
+                await self.writer_conn.execute(pragma)
+            logger.debug("Opened bot database writer connection: %s", self.bot_db_path)
+        return self.writer_conn
+    
+    @asynccontextmanager
+    async def _write(self, transaction: bool = True):
+        """Yield the writer connection with exclusive access
+        
+        By default the block runs in a BEGIN IMMEDIATE transaction, taking the
+        write lock up front rather than upgrading to it mid-transaction, and is
+        committed on exit. Pass transaction=False for statements that can't run
+        inside a transaction (journal_mode changes, executescript).
+        """
+        async with self._write_lock:
+            db = await self._get_writer()
+            try:
+                if transaction:
+                    await db.execute("BEGIN IMMEDIATE")
+                yield db
+                if db.in_transaction:
+                    await db.commit()
+            except BaseException:
+                # Don't leave a half-applied write open on the shared connection,
+                # including when the caller's task is cancelled mid-write
+                if db.in_transaction:
+                    await db.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def read(self):
+        """Yield a free read-only connection from the bot database pool"""
+        async with self.reader_pool.connection() as db:
+            yield db
+    
+    async def close(self):
+        """Close the writer and all pooled connections"""
+        await self.reader_pool.close()
+        await self.main_db_pool.close()
+        
+        if self.writer_conn is not None:
+            await self.writer_conn.close()
+            self.writer_conn = None
+        
+        logger.info("Database connections closed")
     
     async def init_bot_database(self):
         """Initialize the bot's SQLite database with required tables"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                # Seasons table
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS seasons (
-                        id INTEGER PRIMARY KEY,
-                        season_number INTEGER UNIQUE,
-                        title TEXT,
-                        start_date INTEGER,
-                        end_date INTEGER,
-                        is_active BOOLEAN DEFAULT FALSE
-                    )
-                """)
-                
-                # Season courses table
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS season_courses (
-                        id INTEGER PRIMARY KEY,
-                        season_id INTEGER,
-                        course_name TEXT,
-                        full_course_name TEXT UNIQUE,
-                        secret_until INTEGER,
-                        expired BOOLEAN DEFAULT FALSE,
-                        final_standings TEXT,
-                        FOREIGN KEY (season_id) REFERENCES seasons (id)
-                    )
-                """)
-                
-                # Player scores table
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS player_scores (
-                        id INTEGER PRIMARY KEY,
-                        season_id INTEGER,
-                        player_name TEXT,
-                        total_points INTEGER DEFAULT 0,
-                        courses_completed INTEGER DEFAULT 0,
-                        FOREIGN KEY (season_id) REFERENCES seasons (id),
-                        UNIQUE(season_id, player_name)
-                    )
-                """)
-                
-                # Course results table
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS course_results (
-                        id INTEGER PRIMARY KEY,
-                        season_id INTEGER,
-                        course_name TEXT,
-                        player_name TEXT,
-                        position INTEGER,
-                        points INTEGER,
-                        duration_ms INTEGER,
-                        time_str TEXT,
-                        FOREIGN KEY (season_id) REFERENCES seasons (id)
-                    )
-                """)
+            async with self._write(transaction=False) as db:
+                await db.executescript(BOT_SCHEMA)
+            
+            async with self._write() as db:
+                await self._ensure_unique_course_results(db)
+            
+            logger.info("Bot database initialized successfully")
                 
-                # Bot messages table for Discord message tracking
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS bot_messages (
-                        id INTEGER PRIMARY KEY,
-                        message_type TEXT,
-                        channel_id INTEGER,
-                        message_id INTEGER,
-                        season_id INTEGER,
-                        created_at INTEGER
-                    )
-                """)
+        except Exception as e:
+            logger.error("Error initializing bot database: %s", e)
+            raise
+    
+    @staticmethod
+    async def _ensure_unique_course_results(db: aiosqlite.Connection):
+        """Enforce one course_results row per (season, course, player)
+        
+        Replayed expiry events are then ignored instead of counted twice.
+        Databases that already hold duplicates are cleaned up first and their
+        player totals recomputed.
+        """
+        try:
+            await db.execute(COURSE_RESULTS_UNIQUE_INDEX)
+            return
+        except sqlite3.IntegrityError:
+            pass
+        
+        logger.warning("Removing duplicate course results before adding unique index")
+        await db.execute("""
+            DELETE FROM course_results
+            WHERE id NOT IN (
+                SELECT MIN(id) FROM course_results
+                GROUP BY season_id, course_name, player_name
+            )
+        """)
+        await db.execute(COURSE_RESULTS_UNIQUE_INDEX)
+        
+        seasons = await db.execute_fetchall("SELECT DISTINCT season_id FROM course_results")
+        for (season_id,) in seasons:
+            await DatabaseManager._recompute_player_scores(db, season_id)
+    
+    async def apply_pragmas(self):
+        """Switch the bot database to WAL mode and apply tuning pragmas (writer connection)"""
+        try:
+            async with self._write(transaction=False) as db:
+                for pragma in SQLITE_PRAGMAS:
+                    await db.execute(pragma)
                 
-                await db.commit()
-                logger.info("Bot database initialized successfully")
+                async with db.execute("PRAGMA journal_mode") as cursor:
+                    journal_mode = (await cursor.fetchone())[0]
+                logger.info("Bot database journal mode: %s", journal_mode)
                 
         except Exception as e:
-            logger.error(f"Error initializing bot database: {e}")
-            raise
+            logger.error("Error applying database pragmas: %s", e)
     
     async def create_season(self, season_number: int, title: str = None) -> int:
         """Create a new season and return its ID"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
+            async with self._write() as db:
                 # Deactivate any existing active seasons
                 await db.execute("UPDATE seasons SET is_active = FALSE WHERE is_active = TRUE")
                 
                 # Create new season
                 start_time = int(datetime.now().timestamp())
-                cursor = await db.execute("""
+                async with db.execute("""
                     INSERT INTO seasons (season_number, title, start_date, is_active)
                     VALUES (?, ?, ?, TRUE)
-                """, (season_number, title, start_time))
+                """, (season_number, title, start_time)) as cursor:
+                    season_id = cursor.lastrowid
                 
                 await db.commit()
-                season_id = cursor.lastrowid
+                self.invalidate_active_season()
                 
-                logger.info(f"Created season {season_number} with ID {season_id}")
+                logger.info("Created season %s with ID %s", season_number, season_id)
                 return season_id
                 
         except Exception as e:
-            logger.error(f"Error creating season: {e}")
+            logger.error("Error creating season: %s", e)
             raise
     
     async def get_active_season(self) -> Optional[Dict]:
-        """Get the currently active season"""
-        try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                cursor = await db.execute("""
-                    SELECT id, season_number, title, start_date, end_date
-                    FROM seasons WHERE is_active = TRUE
-                """)
-                
+        """Get the currently active season, from the in-memory cache when fresh"""
+        if time.monotonic() < self._active_season_expires:
+            return self._active_season_cache
+        
+        async with self._active_season_lock:
+            if time.monotonic() >= self._active_season_expires:
+                try:
+                    self._active_season_cache = await self._fetch_active_season()
+                    self._active_season_expires = time.monotonic() + ACTIVE_SEASON_TTL
+                except Exception as e:
+                    logger.error("Error getting active season: %s", e)
+                    return None
+            return self._active_season_cache
+    
+    async def _fetch_active_season(self) -> Optional[Dict]:
+        """Query the currently active season"""
+        async with self.read() as db:
+            async with db.execute("""
+                SELECT id, season_number, title, start_date, end_date
+                FROM seasons WHERE is_active = TRUE
+            """) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    return {
-                        'id': row[0],
-                        'season_number': row[1],
-                        'title': row[2],
-                        'start_date': row[3],
-                        'end_date': row[4]
-                    }
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error getting active season: {e}")
+            if row:
+                return {
+                    'id': row[0],
+                    'season_number': row[1],
+                    'title': row[2],
+                    'start_date': row[3],
+                    'end_date': row[4]
+                }
             return None
-        
+    
     async def end_season(self, season_id: int):
         """End the current season"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
+            async with self._write() as db:
                 end_time = int(datetime.now().timestamp())
                 await db.execute("""
                     UPDATE seasons 
@@ -156,22 +417,22 @@ class DatabaseManager:
                 """, (end_time, season_id))
                 
                 await db.commit()
-                logger.info(f"Ended season ID {season_id}")
+                self.invalidate_active_season()
+                logger.info("Ended season ID %s", season_id)
                 
         except Exception as e:
-            logger.error(f"Error ending season: {e}")
+            logger.error("Error ending season: %s", e)
             raise
 
     async def get_season_by_number(self, season_number: int) -> Optional[Dict]:
         """Get season by season number"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                cursor = await db.execute("""
+            async with self.read() as db:
+                async with db.execute("""
                     SELECT id, season_number, title, start_date, end_date, is_active
                     FROM seasons WHERE season_number = ?
-                """, (season_number,))
-                
-                row = await cursor.fetchone()
+                """, (season_number,)) as cursor:
+                    row = await cursor.fetchone()
                 if row:
                     return {
                         'id': row[0],
@@ -184,115 +445,185 @@ class DatabaseManager:
                 return None
                 
         except Exception as e:
-            logger.error(f"Error getting season by number: {e}")
+            logger.error("Error getting season by number: %s", e)
             return None
     
     async def add_season_course(self, season_id: int, full_course_name: str, secret_until: int):
         """Add a course to the current season"""
         try:
-            # Extract course name from full name (part in parentheses)
-            course_name = full_course_name.split('(')[1].split(')')[0] if '(' in full_course_name else full_course_name
-            
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                await db.execute("""
-                    INSERT OR REPLACE INTO season_courses 
-                    (season_id, course_name, full_course_name, secret_until, expired)
-                    VALUES (?, ?, ?, ?, FALSE)
-                """, (season_id, course_name, full_course_name, secret_until))
+            async with self._write() as db:
+                await self._insert_course(db, season_id, full_course_name, secret_until)
                 
                 await db.commit()
-                logger.info(f"Added course {full_course_name} to season {season_id}")
+                logger.info("Added course %s to season %s", full_course_name, season_id)
                 
         except Exception as e:
-            logger.error(f"Error adding season course: {e}")
+            logger.error("Error adding season course: %s", e)
             raise
 
     async def remove_season_course(self, season_id: int, full_course_name: str):
         """Remove a course from specified season"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                await db.execute("""
-                    DELETE FROM season_courses 
-                    WHERE season_id = ? AND full_course_name = ?
-                """, (season_id, full_course_name))
+            async with self._write() as db:
+                await self._delete_course(db, season_id, full_course_name)
                 
                 await db.commit()
-                logger.info(f"Removed course {full_course_name} from season {season_id}")
+                logger.info("Removed course %s from season %s", full_course_name, season_id)
         except Exception as e:
-            logger.error(f"Error removing season course: {e}")
+            logger.error("Error removing season course: %s", e)
             raise
 
-    async def expire_course(self, full_course_name: str, standings_data: Dict):
-        """Mark a course as expired and store final standings"""
+    async def expire_course(self, full_course_name: str, standings_data: Dict,
+                            standings_json: Optional[str] = None):
+        """Mark a course as expired and store final standings
+        
+        standings_json may carry the already-serialized standings_data (e.g. the
+        raw log event) to store as-is instead of re-encoding it.
+        """
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                # Get active season
-                season = await self.get_active_season()
-                if not season:
-                    logger.warning("No active season found when expiring course")
-                    return
-                
-                # Update course as expired
-                await db.execute("""
-                    UPDATE season_courses 
-                    SET expired = TRUE, final_standings = ?
-                    WHERE full_course_name = ? AND season_id = ?
-                """, (json.dumps(standings_data), full_course_name, season['id']))
-                
-                # Store individual results and calculate points
-                course_name = full_course_name.split('(')[1].split(')')[0] if '(' in full_course_name else full_course_name
-                
-                for result in standings_data.get('standings', []):
-                    points = self.calculate_points(result['rank'])
-                    
-                    # Store course result
-                    await db.execute("""
-                        INSERT INTO course_results 
-                        (season_id, course_name, player_name, position, points, duration_ms, time_str)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (season['id'], course_name, result['username'], result['rank'], 
-                          points, result['duration_ms'], result['time_str']))
-                    
-                    # Update player total score
-                    await db.execute("""
-                        INSERT INTO player_scores (season_id, player_name, total_points, courses_completed)
-                        VALUES (?, ?, ?, 1)
-                        ON CONFLICT(season_id, player_name) DO UPDATE SET
-                            total_points = total_points + ?,
-                            courses_completed = courses_completed + 1
-                    """, (season['id'], result['username'], points, points))
+            # Get active season
+            season = await self.get_active_season()
+            if not season:
+                logger.warning("No active season found when expiring course")
+                return
+            
+            async with self._write() as db:
+                if await self._store_expiry(db, season['id'], full_course_name, standings_data, standings_json):
+                    await self._recompute_player_scores(db, season['id'])
+                
+                await db.commit()
+                logger.info("Course %s marked as expired with %s results",
+                            full_course_name, len(standings_data.get('standings', [])))
+                
+        except Exception as e:
+            logger.error("Error expiring course: %s", e, exc_info=True)
+            raise
+
+    async def apply_sclog_batch(self, season_id: int, events: List[Dict]) -> List[Dict]:
+        """Apply a batch of parsed log events to a season in one transaction
+        
+        Each event is a dict with a 'type' of 'added' (full_course_name,
+        secret_until), 'removed' (full_course_name) or 'expired'
+        (full_course_name, event_data, content). Each event runs in its own
+        savepoint, so one that fails is logged and skipped without losing the
+        rest. Player totals are recomputed once at the end if any expiry
+        stored results. Returns the events that were applied.
+        """
+        try:
+            async with self._write() as db:
+                applied = []
+                results_stored = False
+                for event in events:
+                    await db.execute("SAVEPOINT sclog_event")
+                    try:
+                        if event['type'] == 'added':
+                            await self._insert_course(db, season_id, event['full_course_name'], event['secret_until'])
+                        elif event['type'] == 'removed':
+                            await self._delete_course(db, season_id, event['full_course_name'])
+                        elif event['type'] == 'expired':
+                            results_stored |= await self._store_expiry(
+                                db, season_id, event['full_course_name'], event['event_data'], event['content']
+                            )
+                    except Exception as e:
+                        await db.execute("ROLLBACK TO sclog_event")
+                        logger.error("Skipping %s event for %s: %s", event['type'], event['full_course_name'], e,
+                                     exc_info=True)
+                    else:
+                        applied.append(event)
+                    finally:
+                        await db.execute("RELEASE sclog_event")
+                
+                if results_stored:
+                    await self._recompute_player_scores(db, season_id)
                 
                 await db.commit()
-                logger.info(f"Course {full_course_name} marked as expired with {len(standings_data.get('standings', []))} results")
+                logger.info("Applied %s of %s log events to season %s", len(applied), len(events), season_id)
+                return applied
                 
         except Exception as e:
-            logger.error(f"Error expiring course: {e}")
+            logger.error("Error applying log events: %s", e, exc_info=True)
             raise
+
+    @staticmethod
+    async def _insert_course(db: aiosqlite.Connection, season_id: int, full_course_name: str, secret_until: int):
+        """Insert (or replace) a season course on the writer connection"""
+        await db.execute("""
+            INSERT OR REPLACE INTO season_courses 
+            (season_id, course_name, full_course_name, secret_until, expired)
+            VALUES (?, ?, ?, ?, FALSE)
+        """, (season_id, parse_course_name(full_course_name), full_course_name, secret_until))
+
+    @staticmethod
+    async def _delete_course(db: aiosqlite.Connection, season_id: int, full_course_name: str):
+        """Delete a season course on the writer connection"""
+        await db.execute("""
+            DELETE FROM season_courses 
+            WHERE season_id = ? AND full_course_name = ?
+        """, (season_id, full_course_name))
+
+    async def _store_expiry(self, db: aiosqlite.Connection, season_id: int, full_course_name: str,
+                            standings_data: Dict, standings_json: Optional[str] = None) -> bool:
+        """Mark a course expired and insert its results on the writer connection
+        
+        Returns whether any results were stored (player totals then need recomputing).
+        """
+        standings = standings_data.get('standings', [])
+        self._standings_cache.pop(full_course_name, None)
+        
+        # Update course as expired
+        await db.execute("""
+            UPDATE season_courses 
+            SET expired = TRUE, final_standings = ?
+            WHERE full_course_name = ? AND season_id = ?
+        """, (standings_json or json_dumps(standings_data), full_course_name, season_id))
+        
+        if not standings:
+            return False
+        
+        # Store individual results and calculate points
+        course_name = parse_course_name(full_course_name)
+        
+        result_rows = []
+        for result in standings:
+            rank = result['rank']
+            points = POINTS_TABLE[rank] if 0 < rank < len(POINTS_TABLE) else 0
+            result_rows.append((season_id, course_name, result['username'], result['rank'],
+                                points, result['duration_ms'], result['time_str']))
+        
+        await db.executemany("""
+            INSERT OR IGNORE INTO course_results 
+            (season_id, course_name, player_name, position, points, duration_ms, time_str)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, result_rows)
+        return True
+
+    @staticmethod
+    async def _recompute_player_scores(db: aiosqlite.Connection, season_id: int):
+        """Recompute a season's player totals in one aggregate upsert"""
+        await db.execute("""
+            INSERT INTO player_scores (season_id, player_name, total_points, courses_completed)
+            SELECT season_id, player_name, SUM(points), COUNT(*)
+            FROM course_results
+            WHERE season_id = ?
+            GROUP BY player_name
+            ON CONFLICT(season_id, player_name) DO UPDATE SET
+                total_points = excluded.total_points,
+                courses_completed = excluded.courses_completed
+        """, (season_id,))
     
     def calculate_points(self, position: int) -> int:
         """Calculate points based on position using Formula 1 style scoring"""
-        points_map = {
-            1: 30, 2: 25, 3: 21, 4: 18, 5: 16, 6: 14, 7: 12, 8: 10, 9: 8, 10: 6
-        }
-        
-        if position <= 10:
-            return points_map[position]
-        elif position <= 15:
-            return 4
-        elif position <= 20:
-            return 3
-        elif position <= 25:
-            return 2
-        elif position <= 30:
-            return 1
-        else:
-            return 0
+        return POINTS_TABLE[position] if 0 < position < len(POINTS_TABLE) else 0
     
     async def get_current_standings(self, course_name: str) -> List[Dict]:
-        """Get current standings for a course from main database"""
+        """Get current standings for a course from main database (cached for STANDINGS_TTL)"""
+        cached = self._standings_cache.get(course_name)
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+        
         try:
-            async with aiosqlite.connect(self.main_db_path) as db:
-                cursor = await db.execute("""
+            async with self.main_db_pool.connection() as db:
+                rows = await db.execute_fetchall("""
                     SELECT username, MIN(duration_ms) AS duration, 
                            ROW_NUMBER() OVER (ORDER BY MIN(duration_ms)) AS position
                     FROM LocalRun 
@@ -301,51 +632,75 @@ class DatabaseManager:
                     ORDER BY duration
                 """, (course_name,))
                 
-                results = []
-                async for row in cursor:
-                    results.append({
-                        'username': row[0],
-                        'duration_ms': row[1],
-                        'position': row[2]
-                    })
+                standings = [
+                    {'username': username, 'duration_ms': duration_ms, 'position': position}
+                    for username, duration_ms, position in rows
+                ]
                 
-                return results
+                self._standings_cache[course_name] = (time.monotonic() + STANDINGS_TTL, standings)
+                return standings
                 
         except Exception as e:
-            logger.error(f"Error getting current standings for {course_name}: {e}")
+            logger.error("Error getting current standings for %s: %s", course_name, e)
             return []
     
+    async def get_current_standings_multi(self, course_names: List[str]) -> Dict[str, List[Dict]]:
+        """Get current standings for several courses with a single main database query
+        
+        Courses still in the standings cache are served from it; the rest are
+        fetched together and cached individually.
+        """
+        now = time.monotonic()
+        result: Dict[str, List[Dict]] = {}
+        missing = []
+        for course_name in course_names:
+            cached = self._standings_cache.get(course_name)
+            if cached and now < cached[0]:
+                result[course_name] = cached[1]
+            else:
+                missing.append(course_name)
+        
+        if not missing:
+            return result
+        
+        try:
+            async with self.main_db_pool.connection() as db:
+                placeholders = ",".join("?" * len(missing))
+                rows = await db.execute_fetchall(f"""
+                    SELECT coursename, username, MIN(duration_ms) AS duration, 
+                           ROW_NUMBER() OVER (PARTITION BY coursename ORDER BY MIN(duration_ms)) AS position
+                    FROM LocalRun 
+                    WHERE coursename IN ({placeholders}) AND style = 1 AND invalid = 0
+                    GROUP BY coursename, username 
+                    ORDER BY coursename, duration
+                """, missing)
+            
+            fetched: Dict[str, List[Dict]] = {course_name: [] for course_name in missing}
+            for course_name, username, duration_ms, position in rows:
+                fetched[course_name].append({'username': username, 'duration_ms': duration_ms, 'position': position})
+            
+            expires = time.monotonic() + STANDINGS_TTL
+            for course_name, standings in fetched.items():
+                self._standings_cache[course_name] = (expires, standings)
+            
+            result.update(fetched)
+            return result
+            
+        except Exception as e:
+            logger.error("Error getting current standings for %s courses: %s", len(missing), e)
+            for course_name in missing:
+                result[course_name] = []
+            return result
+    
     async def get_season_leaderboard(self, season_id: int) -> List[Dict]:
         """Get overall season leaderboard with 60%/80% scoring rules"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                # Get all course results for the season
-                cursor = await db.execute("""
-                    SELECT player_name, course_name, points
-                    FROM course_results 
-                    WHERE season_id = ?
-                    ORDER BY player_name, points DESC
-                """, (season_id,))
-                
-                # Group results by player
-                player_results = {}
-                async for row in cursor:
-                    player_name = row[0]
-                    course_name = row[1] 
-                    points = row[2]
-                    
-                    if player_name not in player_results:
-                        player_results[player_name] = []
-                    player_results[player_name].append({
-                        'course': course_name,
-                        'points': points
-                    })
-                
+            async with self.read() as db:
                 # Get total number of courses in season
-                cursor = await db.execute("""
+                async with db.execute("""
                     SELECT COUNT(*) FROM season_courses WHERE season_id = ?
-                """, (season_id,))
-                total_courses = (await cursor.fetchone())[0]
+                """, (season_id,)) as cursor:
+                    total_courses = (await cursor.fetchone())[0]
                 
                 if total_courses == 0:
                     return []
@@ -359,59 +714,76 @@ class DatabaseManager:
                 if best_courses_count == 0 or best_courses_count > total_courses:
                     best_courses_count = total_courses
 
-                logger.debug(f"Season {season_id}: {total_courses} total courses, "
-                           f"need {min_courses_required} minimum, best {best_courses_count} count")
-                
-                # Calculate final scores
-                final_leaderboard = []
-                for player_name, results in player_results.items():
-                    courses_completed = len(results)
-                    
-                    # Check minimum participation requirement
-                    if min_courses_required and courses_completed < min_courses_required:
-                        continue  # Player doesn't qualify
-                    
-                    # Sort by points descending and take best scores
-                    results.sort(key=lambda x: x['points'], reverse=True)
-                    best_scores = results[:best_courses_count]
-                    total_points = sum(score['points'] for score in best_scores)
-                    
-                    final_leaderboard.append({
-                        'username': player_name,
-                        'total_points': total_points,
-                        'courses_completed': courses_completed,
-                        'courses_counted': len(best_scores)
-                    })
-                
-                # Sort by total points descending
-                final_leaderboard.sort(key=lambda x: (-x['total_points'], -x['courses_completed']))
-                
-                # Add positions
-                for i, player in enumerate(final_leaderboard):
-                    player['position'] = i + 1
-                
-                return final_leaderboard
+                logger.debug("Season %s: %s total courses, need %s minimum, best %s count",
+                             season_id, total_courses, min_courses_required, best_courses_count)
+                
+                # Rank each player's results, then sum their best N among players
+                # meeting the minimum participation requirement
+                rows = await db.execute_fetchall("""
+                    WITH ranked AS (
+                        SELECT player_name, points,
+                               ROW_NUMBER() OVER (PARTITION BY player_name ORDER BY points DESC) AS rn,
+                               COUNT(*) OVER (PARTITION BY player_name) AS completed
+                        FROM course_results
+                        WHERE season_id = ?
+                    )
+                    SELECT player_name, SUM(points) AS total_points, MAX(completed) AS courses_completed,
+                           COUNT(*) AS courses_counted
+                    FROM ranked
+                    WHERE rn <= ? AND completed >= ?
+                    GROUP BY player_name
+                    ORDER BY total_points DESC, courses_completed DESC, player_name
+                """, (season_id, best_courses_count, min_courses_required))
+                
+                return [
+                    {
+                        'username': row[0],
+                        'total_points': row[1],
+                        'courses_completed': row[2],
+                        'courses_counted': row[3],
+                        'position': position
+                    }
+                    for position, row in enumerate(rows, start=1)
+                ]
                 
         except Exception as e:
-            logger.error(f"Error getting season leaderboard: {e}")
+            logger.error("Error getting season leaderboard: %s", e)
             return []
     
     async def get_season_leaderboard_with_projections(self, season_id: int) -> List[Dict]:
         """Get season leaderboard with projected scores included"""
         try:
-            # Get base leaderboard first (players with expired course results)
-            leaderboard = await self.get_season_leaderboard(season_id)
-
-            # Get all courses for this season
-            courses = await self.get_active_courses(season_id)
+            # Base leaderboard, courses and expired results are independent reads
+            leaderboard, courses, expired_rows = await asyncio.gather(
+                self.get_season_leaderboard(season_id),
+                self.get_active_courses(season_id),
+                self._get_course_points(season_id)
+            )
             active_courses = [c for c in courses if not c['expired']]
-
+            
+            # Live standings once per active course (not once per player per course)
+            live_standings = (await self.get_current_standings_multi(
+                [course['full_course_name'] for course in active_courses]
+            )).values()
+            
+            # Projected points per player from their live position on each active course
+            live_points: Dict[str, List[int]] = {}
+            for standings in live_standings:
+                for standing in standings:
+                    position = standing.get('position', standing.get('rank', 999))
+                    live_points.setdefault(standing['username'], []).append(self.calculate_points(position))
+            
+            # Actual points and distinct courses per player from expired courses
+            expired_points: Dict[str, List[int]] = {}
+            expired_courses: Dict[str, set] = {}
+            for player_name, course_name, points in expired_rows:
+                expired_points.setdefault(player_name, []).append(points)
+                expired_courses.setdefault(player_name, set()).add(course_name)
+            
             # Discover players from active courses who aren't in base leaderboard yet
             existing_players = {p['username'] for p in leaderboard}
-
-            for course in active_courses:
-                current_standings = await self.get_current_standings(course['full_course_name'])
-                for standing in current_standings:
+            for standings in live_standings:
+                for standing in standings:
                     if standing['username'] not in existing_players:
                         # Add new player with 0 actual points
                         leaderboard.append({
@@ -421,77 +793,37 @@ class DatabaseManager:
                             'courses_counted': 0
                         })
                         existing_players.add(standing['username'])
-
+            
+            # Apply best_courses_count rule if configured
+            total_courses = len(courses)
+            best_courses_count = config.get("best_courses_count", 0)
+            if best_courses_count == 0 or best_courses_count > total_courses:
+                best_courses_count = total_courses
+            
             # Calculate correct courses_completed count and projected scores
             for player in leaderboard:
                 player_name = player['username']
+                player_live_points = live_points.get(player_name, [])
                 
                 # Count total courses this player has runs on (active + expired)
-                total_courses_ran = 0
-                projected_points = player['total_points']  # Start with actual points
-                
-                # Count expired courses (from course_results table)
-                async with aiosqlite.connect(self.bot_db_path) as db:
-                    cursor = await db.execute("""
-                        SELECT COUNT(DISTINCT course_name) FROM course_results 
-                        WHERE season_id = ? AND player_name = ?
-                    """, (season_id, player_name))
-                    
-                    expired_courses_ran = (await cursor.fetchone())[0]
-                    total_courses_ran += expired_courses_ran
-                
-                # Check active courses and add projected points
-                for course in active_courses:
-                    current_standings = await self.get_current_standings(course['full_course_name'])
-                    player_standing = next((s for s in current_standings if s['username'] == player_name), None)
-                    
-                    if player_standing:
-                        total_courses_ran += 1  # Player has a run on this active course
-                        position = player_standing.get('position', player_standing.get('rank', 999))
-                        projected_points += self.calculate_points(position)
-                
-                # Update courses_completed to reflect actual count
-                player['courses_completed'] = total_courses_ran
+                total_courses_ran = len(expired_courses.get(player_name, ())) + len(player_live_points)
+                # Actual points plus the points from each active course's live position
+                projected_points = player['total_points'] + sum(player_live_points)
                 
-                # Apply best_courses_count rule if configured
-                total_courses = len(courses)
-                best_courses_count = config.get("best_courses_count", 0)
-                if best_courses_count == 0 or best_courses_count > total_courses:
-                    best_courses_count = total_courses
-
                 if total_courses_ran >= best_courses_count:
-                    # Get all individual course points (actual + projected)
-                    all_course_points = []
-                    
-                    # Add actual points from expired courses
-                    async with aiosqlite.connect(self.bot_db_path) as db:
-                        cursor = await db.execute("""
-                            SELECT points FROM course_results 
-                            WHERE season_id = ? AND player_name = ?
-                        """, (season_id, player_name))
-                        
-                        async for row in cursor:
-                            all_course_points.append(row[0])
-                    
-                    # Add projected points from active courses
-                    for course in active_courses:
-                        current_standings = await self.get_current_standings(course['full_course_name'])
-                        player_standing = next((s for s in current_standings if s['username'] == player_name), None)
-                        
-                        if player_standing:
-                            position = player_standing.get('position', player_standing.get('rank', 999))
-                            all_course_points.append(self.calculate_points(position))
-                    
-                    # Apply best_courses_count rule: take best scores
+                    # Take the best scores across actual + projected points
+                    all_course_points = expired_points.get(player_name, []) + player_live_points
                     if all_course_points:
                         all_course_points.sort(reverse=True)  # Highest first
-                        best_scores = all_course_points[:best_courses_count]
-                        projected_points = sum(best_scores)
+                        projected_points = sum(all_course_points[:best_courses_count])
                 
+                # Update courses_completed to reflect actual count
+                player['courses_completed'] = total_courses_ran
                 player['projected_points'] = projected_points
             
             # Re-sort by actual points, then projected points as tiebreaker
-            leaderboard.sort(key=lambda x: (-x['total_points'], -x.get('projected_points', 0), -x['courses_completed']))
+            # (every player has projected_points by now; reverse sorts stay stable)
+            leaderboard.sort(key=itemgetter('total_points', 'projected_points', 'courses_completed'), reverse=True)
             
             # Update positions
             for i, player in enumerate(leaderboard):
@@ -500,43 +832,119 @@ class DatabaseManager:
             return leaderboard
             
         except Exception as e:
-            logger.error(f"Error getting leaderboard with projections: {e}")
+            logger.error("Error getting leaderboard with projections: %s", e)
+            return []
+    
+    async def _get_course_points(self, season_id: int) -> List[Tuple[str, str, int]]:
+        """Get (player_name, course_name, points) for every expired-course result in a season"""
+        async with self.read() as db:
+            return await db.execute_fetchall("""
+                SELECT player_name, course_name, points
+                FROM course_results
+                WHERE season_id = ?
+            """, (season_id,))
+
+    async def get_active_courses(self, season_id: int, with_standings: bool = False) -> List[Dict]:
+        """Get all courses for the active season
+        
+        final_standings is only read and decoded when with_standings is set;
+        otherwise it is None on every course.
+        """
+        try:
+            async with self.read() as db:
+                rows = await db.execute_fetchall(f"""
+                    SELECT course_name, full_course_name, secret_until, expired,
+                           {'final_standings' if with_standings else 'NULL'}
+                    FROM season_courses 
+                    WHERE season_id = ?
+                    ORDER BY secret_until ASC
+                """, (season_id,))
+                
+                return [self._course_from_row(row) for row in rows]
+                
+        except Exception as e:
+            logger.error("Error getting active courses: %s", e)
             return []
 
-    async def get_active_courses(self, season_id: int) -> List[Dict]:
-        """Get all courses for the active season"""
+    async def get_active_courses_split(self, season_id: int) -> Tuple[List[Dict], List[Dict]]:
+        """Get a season's (active, expired) courses, each ordered by expiry time
+        
+        Courses carry a standings_count instead of the decoded final_standings,
+        so the stored standings JSON is never parsed in Python here.
+        """
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                cursor = await db.execute("""
-                    SELECT course_name, full_course_name, secret_until, expired, final_standings
+            async with self.read() as db:
+                rows = await db.execute_fetchall("""
+                    SELECT course_name, full_course_name, secret_until, expired,
+                           COALESCE(json_array_length(final_standings, '$.standings'), 0)
                     FROM season_courses 
                     WHERE season_id = ?
                     ORDER BY secret_until ASC
                 """, (season_id,))
                 
-                results = []
-                async for row in cursor:
-                    final_standings = json.loads(row[4]) if row[4] else None
-                    results.append({
+                active, expired = [], []
+                for row in rows:
+                    (expired if row[3] else active).append({
                         'course_name': row[0],
                         'full_course_name': row[1],
                         'secret_until': row[2],
                         'expired': bool(row[3]),
-                        'final_standings': final_standings
+                        'standings_count': row[4]
                     })
                 
-                return results
+                return active, expired
                 
         except Exception as e:
-            logger.error(f"Error getting active courses: {e}")
-            return []
+            logger.error("Error getting split courses: %s", e)
+            return [], []
+
+    @staticmethod
+    def _course_from_row(row) -> Dict:
+        """Build a course dict from a season_courses row"""
+        return {
+            'course_name': row[0],
+            'full_course_name': row[1],
+            'secret_until': row[2],
+            'expired': bool(row[3]),
+            'final_standings': json_loads(row[4]) if row[4] else None
+        }
+
+    async def get_season_info_bundle(self) -> Optional[Dict]:
+        """Get the active season together with its active/expired course counts"""
+        try:
+            async with self.read() as db:
+                async with db.execute("""
+                    SELECT s.id, s.season_number, s.title, s.start_date, s.end_date,
+                           COALESCE(SUM(CASE WHEN c.id IS NOT NULL AND NOT c.expired THEN 1 ELSE 0 END), 0),
+                           COALESCE(SUM(CASE WHEN c.expired THEN 1 ELSE 0 END), 0)
+                    FROM seasons s
+                    LEFT JOIN season_courses c ON c.season_id = s.id
+                    WHERE s.is_active = TRUE
+                    GROUP BY s.id
+                """) as cursor:
+                    row = await cursor.fetchone()
+                if row:
+                    return {
+                        'id': row[0],
+                        'season_number': row[1],
+                        'title': row[2],
+                        'start_date': row[3],
+                        'end_date': row[4],
+                        'active_courses': row[5],
+                        'expired_courses': row[6]
+                    }
+                return None
+                
+        except Exception as e:
+            logger.error("Error getting season info bundle: %s", e)
+            return None
 
 # Add these methods after get_active_courses()
 
     async def store_message_id(self, message_type: str, channel_id: int, message_id: int, season_id: int):
         """Store Discord message ID for tracking"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     INSERT OR REPLACE INTO bot_messages 
                     (message_type, channel_id, message_id, season_id, created_at)
@@ -544,38 +952,34 @@ class DatabaseManager:
                 """, (message_type, channel_id, message_id, season_id, int(datetime.now().timestamp())))
                 
                 await db.commit()
-                logger.debug(f"Stored message ID {message_id} for type {message_type}")
+                logger.debug("Stored message ID %s for type %s", message_id, message_type)
                 
         except Exception as e:
-            logger.error(f"Error storing message ID: {e}")
+            logger.error("Error storing message ID: %s", e)
 
     async def get_message_ids(self, season_id: int) -> Dict[str, Dict]:
         """Get stored message IDs for current season"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
-                cursor = await db.execute("""
+            async with self.read() as db:
+                rows = await db.execute_fetchall("""
                     SELECT message_type, channel_id, message_id
                     FROM bot_messages 
                     WHERE season_id = ?
                 """, (season_id,))
                 
-                messages = {}
-                async for row in cursor:
-                    messages[row[0]] = {
-                        'channel_id': row[1],
-                        'message_id': row[2]
-                    }
-                
-                return messages
+                return {
+                    message_type: {'channel_id': channel_id, 'message_id': message_id}
+                    for message_type, channel_id, message_id in rows
+                }
                 
         except Exception as e:
-            logger.error(f"Error getting message IDs: {e}")
+            logger.error("Error getting message IDs: %s", e)
             return {}
 
     async def delete_message_id(self, message_type: str, season_id: int):
         """Delete stored message ID"""
         try:
-            async with aiosqlite.connect(self.bot_db_path) as db:
+            async with self._write() as db:
                 await db.execute("""
                     DELETE FROM bot_messages 
                     WHERE message_type = ? AND season_id = ?
@@ -584,7 +988,7 @@ class DatabaseManager:
                 await db.commit()
                 
         except Exception as e:
-            logger.error(f"Error deleting message ID: {e}")
+            logger.error("Error deleting message ID: %s", e)
 
 # Global database manager instance
 db_manager = DatabaseManager()
\ No newline at end of file
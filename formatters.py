@@ -3,11 +3,54 @@ Message formatters for SecretCourse Discord Bot
 Handles formatting of live update messages
 """
 import discord
-from datetime import datetime
 from typing import List, Dict, Optional
 import math
+import time
+from itertools import zip_longest
 
 from config import config
+from db_manager import POINTS_TABLE
+
+# Prefixes for the top three places; everyone else gets "N."
+MEDALS = ("🥇", "🥈", "🥉")
+
+def rank_prefix(position: int) -> str:
+    """Medal for positions 1-3, otherwise the position number"""
+    return MEDALS[position - 1] if 1 <= position <= 3 else f"{position}."
+
+# Footer timestamp shared by the embeds built in one update pass
+_last_ts = (0.0, "")
+
+def _footer_ts() -> str:
+    """Current time for embed footers, reformatted at most once a second"""
+    global _last_ts
+    now = time.monotonic()
+    if now - _last_ts[0] >= 1.0:
+        _last_ts = (now, time.strftime('%Y-%m-%d %H:%M:%S'))
+    return _last_ts[1]
+
+def _normalize_standings(standings: List[Dict]) -> tuple:
+    """(position, username, time_str) for each standing; live rows carry
+    'position', stored final standings 'rank', rows with neither are skipped"""
+    normalized = []
+    for standing in standings:
+        position = standing.get('position', standing.get('rank'))
+        if position is not None:
+            normalized.append((position, standing['username'], standing.get('time_str')))
+    return tuple(normalized)
+
+# Last embed built per (season id, message type), as (content key, embed)
+_embed_cache: Dict[tuple, tuple] = {}
+
+def _cached_embed(season: Dict, message_type: str, key: tuple) -> Optional[discord.Embed]:
+    """The last embed built for this message if its content key is unchanged,
+    with the footer timestamp refreshed"""
+    cached = _embed_cache.get((season['id'], message_type))
+    if cached and cached[0] == key:
+        embed = cached[1]
+        embed.set_footer(text=f"Last updated: {_footer_ts()}")
+        return embed
+    return None
 
 class MessageFormatter:
     """Formats various types of messages for Discord"""
@@ -16,16 +59,14 @@ class MessageFormatter:
     def format_time_remaining(timestamp: int) -> str:
         """Format timestamp to countdown string"""
         try:
-            expiry = datetime.fromtimestamp(timestamp)
-            now = datetime.now()
-            time_diff = expiry - now
+            remaining = int(timestamp - time.time())
             
-            if time_diff.total_seconds() <= 0:
+            if remaining <= 0:
                 return "EXPIRED"
             
-            days = time_diff.days
-            hours = time_diff.seconds // 3600
-            minutes = (time_diff.seconds % 3600) // 60
+            days, remaining = divmod(remaining, 86400)
+            hours, remaining = divmod(remaining, 3600)
+            minutes = remaining // 60
             
             time_parts = []
             if days > 0:
@@ -43,6 +84,14 @@ class MessageFormatter:
     @staticmethod
     def create_season_summary(season: Dict, leaderboard: List[Dict]) -> discord.Embed:
         """Create the season summary message (message type 1)"""
+        key = (
+            season.get('season_number'), season.get('title'), config.get("show_spoilers", True),
+            tuple((p['position'], p['username'], p['total_points']) for p in leaderboard)
+        )
+        embed = _cached_embed(season, "season_summary", key)
+        if embed is not None:
+            return embed
+        
         embed = discord.Embed(
             title=f"🏆 Season {season['season_number']} - Live Standings",
             color=discord.Color.gold()
@@ -57,12 +106,10 @@ class MessageFormatter:
             return embed
         
         # Top 5 players
-        top_5 = leaderboard[:5]
-        top_5_text = []
-        
-        for player in top_5:
-            medal = "🥇" if player['position'] == 1 else "🥈" if player['position'] == 2 else "🥉" if player['position'] == 3 else f"{player['position']}."
-            top_5_text.append(f"{medal} {player['username']} - {player['total_points']} pts")
+        top_5_text = [
+            f"{rank_prefix(player['position'])} {player['username']} - {player['total_points']} pts"
+            for player in leaderboard[:5]
+        ]
         
         embed.add_field(name="Top 5", value="\n".join(top_5_text), inline=False)
         
@@ -86,13 +133,26 @@ class MessageFormatter:
             )
         
         # Add last updated timestamp
-        embed.set_footer(text=f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        embed.set_footer(text=f"Last updated: {_footer_ts()}")
+        _embed_cache[(season['id'], "season_summary")] = (key, embed)
         
         return embed
 
     @staticmethod
     def create_season_standings(season: Dict, leaderboard: List[Dict]) -> discord.Embed:
         """Create the detailed season standings table (message type 2)"""
+        key = (
+            season.get('season_number'), season.get('title'), len(leaderboard),
+            tuple(
+                (p['position'], p['username'], p['total_points'],
+                 p.get('projected_points', p['total_points']), p['courses_completed'])
+                for p in leaderboard[:20]
+            )
+        )
+        embed = _cached_embed(season, "season_standings", key)
+        if embed is not None:
+            return embed
+        
         embed = discord.Embed(
             title=f"📊 Season {season['season_number']} Standings",
             color=discord.Color.blue()
@@ -106,9 +166,11 @@ class MessageFormatter:
             return embed
         
         # Create table format with new columns
-        standings_text = "```\nPos | Player     | Score | Projected | Courses\n"
-        standings_text += "    |            |       | Score     | Ran    \n"
-        standings_text += "----|------------|-------|-----------|--------\n"
+        standings_lines = [
+            "```\nPos | Player     | Score | Projected | Courses\n",
+            "    |            |       | Score     | Ran    \n",
+            "----|------------|-------|-----------|--------\n",
+        ]
         
         # Show more players in this detailed view
         display_count = min(20, len(leaderboard))
@@ -127,9 +189,10 @@ class MessageFormatter:
             # Courses ran count
             courses_ran = player['courses_completed']
             
-            standings_text += f" {player['position']:2d} | {username_padded} | {actual_score:5d} | {projected_score:9d} | {courses_ran:6d}\n"
+            standings_lines.append(f" {player['position']:2d} | {username_padded} | {actual_score:5d} | {projected_score:9d} | {courses_ran:6d}\n")
         
-        standings_text += "```"
+        standings_lines.append("```")
+        standings_text = "".join(standings_lines)
         
         embed.add_field(name="Detailed Standings", value=standings_text, inline=False)
         
@@ -140,13 +203,40 @@ class MessageFormatter:
                 inline=True
             )
         
-        embed.set_footer(text=f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        embed.set_footer(text=f"Last updated: {_footer_ts()}")
+        _embed_cache[(season['id'], "season_standings")] = (key, embed)
         
         return embed    
  
     @staticmethod 
     def create_course_grid(season: Dict, courses: List[Dict], current_standings: Dict) -> discord.Embed:
-        """Create the per-course standings grid (message type 3)"""
+        """Create the per-course standings grid (message type 3)
+        
+        The embed is reused while everything it displays (countdowns, top 10s,
+        layout settings) is unchanged; only the footer is refreshed.
+        """
+        courses_per_row = config.get("courses_per_row", 2)
+        show_times_expired = config.get("show_times_expired", True)
+        
+        # Status line and normalized top 10 per course, used for both the key and the render
+        statuses = {
+            c['course_name']: "EXPIRED" if c['expired']
+            else f"Expires: {MessageFormatter.format_time_remaining(c['secret_until'])}"
+            for c in courses
+        }
+        top_standings = {
+            c['course_name']: _normalize_standings(current_standings.get(c['course_name'], [])[:10])
+            for c in courses
+        }
+        
+        key = (
+            season.get('season_number'), season.get('title'), courses_per_row, show_times_expired,
+            tuple((c['course_name'], statuses[c['course_name']], top_standings[c['course_name']]) for c in courses)
+        )
+        embed = _cached_embed(season, "course_grid", key)
+        if embed is not None:
+            return embed
+        
         embed = discord.Embed(
             title=f"🗺️ Season {season['season_number']} - Course Progress",
             color=discord.Color.green()
@@ -159,16 +249,13 @@ class MessageFormatter:
             embed.add_field(name="Courses", value="No courses available", inline=False)
             return embed
         
-        # Separate active and expired courses
+        # Active courses first, expired at the end (both keep the
+        # secret_until order the database returns them in)
         active_courses = [c for c in courses if not c['expired']]
         expired_courses = [c for c in courses if c['expired']]
-        
-        # Sort active by expiry time, expired at the end
-        active_courses.sort(key=lambda x: x['secret_until'])
         all_courses = active_courses + expired_courses
         
         # Group courses into rows (3 per row)
-        courses_per_row = config.get("courses_per_row", 2)
         course_rows = [all_courses[i:i + courses_per_row] for i in range(0, len(all_courses), courses_per_row)]
         
         for row_index, course_row in enumerate(course_rows):
@@ -177,37 +264,17 @@ class MessageFormatter:
             
             for course in course_row:
                 course_name = course['course_name']
-                
-                if course['expired']:
-                    status = "EXPIRED"
-                else:
-                    time_remaining = MessageFormatter.format_time_remaining(course['secret_until'])
-                    status = f"Expires: {time_remaining}"
-                
-                # Get standings for this course
-                course_standings = current_standings.get(course_name, [])
+                show_times = course['expired'] and show_times_expired
                 
                 # Build the column content
-                column_lines = [f"{course_name.title()}", status, "-----"]
+                column_lines = [f"{course_name.title()}", statuses[course_name], "-----"]
                 
-                # Add top 5 players
-                top_players = course_standings[:10]
-                for standing in top_players:
-                    # Handle different field names for active vs expired courses
-                    if 'position' in standing:
-                        position = standing['position']
-                    elif 'rank' in standing:
-                        position = standing['rank']
-                    else:
-                        continue
-                    
-                    points = MessageFormatter.calculate_points(position)
-                    username = standing['username']
-                    
+                # Add top 10 players
+                for position, username, time_str in top_standings[course_name]:
                     # Add time for expired courses
-                    if course['expired'] and config.get("show_times_expired", True) and 'time_str' in standing:
-                        time_str = f"{standing['time_str']}"
-                        column_lines.append(f"{(str(position) + '.'):<3} {username[:6]:<6} - {points:<2}pts - {time_str[:7]:<7}")
+                    if show_times and time_str is not None:
+                        points = MessageFormatter.calculate_points(position)
+                        column_lines.append(f"{(str(position) + '.'):<3} {username[:6]:<6} - {points:<2}pts - {str(time_str)[:7]:<7}")
                     else:
                         column_lines.append(f"{(str(position) + '.'):<3} {username[:10]:<10}")
                 
@@ -243,31 +310,14 @@ class MessageFormatter:
                 if len(column_lines) == 2:  # Only header and status
                     column_lines.append("-")
                 
-                course_columns.append(column_lines)
+                # Pad every cell to a consistent width
+                course_columns.append([f"{line:<25}" for line in column_lines])
             
             # Create the formatted output for this row
             row_title = f"Courses {row_index * courses_per_row + 1}-{min((row_index + 1) * courses_per_row, len(all_courses))}"
             
-            # Find the maximum number of lines in any column
-            max_lines = max(len(column) for column in course_columns)
-            
-            # Pad shorter columns with empty strings
-            for column in course_columns:
-                while len(column) < max_lines:
-                    column.append("")
-            
-            # Create the code block format
-            formatted_rows = []
-            for line_index in range(max_lines):
-                row_parts = []
-                for column in course_columns:
-                    # Get the line for this column, or empty string if column is shorter
-                    line_content = column[line_index] if line_index < len(column) else ""
-                    # Pad to consistent width (adjust as needed)
-                    padded_content = f"{line_content:<25}"
-                    row_parts.append(padded_content)
-                
-                formatted_rows.append(" | ".join(row_parts))
+            # Create the code block format, filling out shorter columns with blank cells
+            formatted_rows = [" | ".join(cells) for cells in zip_longest(*course_columns, fillvalue=" " * 25)]
             
             # Join all rows and wrap in code block
             formatted_content = "```\n" + "\n".join(formatted_rows) + "\n```"
@@ -282,26 +332,12 @@ class MessageFormatter:
             # if row_index < len(course_rows) - 1:
             #     embed.add_field(name="\u200b", value="\u200b", inline=False)
         
-        embed.set_footer(text=f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        embed.set_footer(text=f"Last updated: {_footer_ts()}")
+        _embed_cache[(season['id'], "course_grid")] = (key, embed)
         
         return embed
 
     @staticmethod
     def calculate_points(position: int) -> int:
         """Calculate points for a given position"""
-        points_map = {
-            1: 30, 2: 25, 3: 21, 4: 18, 5: 16, 6: 14, 7: 12, 8: 10, 9: 8, 10: 6
-        }
-        
-        if position <= 10:
-            return points_map[position]
-        elif position <= 15:
-            return 4
-        elif position <= 20:
-            return 3
-        elif position <= 25:
-            return 2
-        elif position <= 30:
-            return 1
-        else:
-            return 0
\ No newline at end of file
+        return POINTS_TABLE[position] if 0 < position < len(POINTS_TABLE) else 0
\ No newline at end of file
@@ -3,21 +3,37 @@ Log file watcher for SecretCourse Discord Bot
 Monitors TaystJK server log for SCLOG events
 """
 import asyncio
-import aiofiles
+import aiofiles.os
 import json
+import os
 import re
 import logging
-from pathlib import Path
 from typing import Optional, Dict, List
 from datetime import datetime
 
 from config import config
-from db_manager import db_manager
+from db_manager import db_manager, parse_course_name, json_loads
+from formatters import rank_prefix
 
 import discord
 
+try:
+    from watchfiles import awatch  # Optional: inotify/kqueue change notifications
+except ImportError:
+    awatch = None
+
 logger = logging.getLogger(__name__)
 
+# SCLOG events (delimiters on a single line), matched against raw log bytes
+SCLOG_PATTERN = re.compile(rb'--SCLOG-START--(.*?)--SCLOG-END--')
+ANSI_PATTERN = re.compile(rb'\x1b\[[0-9;]*[mK]')
+
+# Upper bound on a single read of new log content
+MAX_READ_BYTES = 1024 * 1024
+
+# Saved log positions are zero-padded to a fixed width so they can be overwritten in place
+POSITION_WIDTH = 20
+
 class LogWatcher:
     """Watches the TaystJK server log file for SCLOG events"""
     
@@ -27,10 +43,12 @@ class LogWatcher:
         self.last_position = 0
         self.bot = bot_instance
         self.running = False
+        self._stop_event = asyncio.Event()
         
-        # Regex patterns for parsing
-        self.sclog_pattern = re.compile(r'--SCLOG-START--(.+?)--SCLOG-END--')
-        self.ansi_pattern = re.compile(r'\x1b\[[0-9;]*[mK]')
+        # Log file descriptor kept open between reads, with the inode it refers to
+        self._fd: Optional[int] = None
+        self._fd_ino: Optional[int] = None
+        self._pos_fd: Optional[int] = None
     
     async def start_monitoring(self):
         """Start monitoring the log file"""
@@ -39,7 +57,8 @@ class LogWatcher:
             return
         
         self.running = True
-        logger.info(f"Starting log file monitoring: {self.log_file_path}")
+        self._stop_event.clear()
+        logger.info("Starting log file monitoring: %s", self.log_file_path)
         
         # Load last position
         await self.load_position()
@@ -48,54 +67,131 @@ class LogWatcher:
         while self.running:
             try:
                 await self.check_log_file()
-                await asyncio.sleep(30)  # Check every 30 seconds
+                log_dir = os.path.dirname(os.path.abspath(self.log_file_path))
+                if awatch is not None and await aiofiles.os.path.isdir(log_dir):
+                    await self._watch_log_file(log_dir)
+                else:
+                    await self._wait(30)  # Poll every 30 seconds
             except Exception as e:
-                logger.error(f"Error in log monitoring loop: {e}")
-                await asyncio.sleep(60)  # Wait longer on error
+                logger.error("Error in log monitoring loop: %s", e)
+                await self._wait(60)  # Wait longer on error
+    
+    async def _watch_log_file(self, log_dir: str):
+        """Read new content whenever the OS reports a change to the log file
+        
+        Watches the log directory rather than the file, so a rotated-in file
+        with a new inode is still seen (check_log_file reopens it). Also checks
+        every 30 seconds in case a notification is missed.
+        """
+        log_name = os.path.basename(self.log_file_path)
+        async for _ in awatch(
+            log_dir,
+            watch_filter=lambda change, path: os.path.basename(path) == log_name,
+            stop_event=self._stop_event,
+            recursive=False,
+            rust_timeout=30_000,
+            yield_on_timeout=True
+        ):
+            await self.check_log_file()
+    
+    async def _wait(self, seconds: float):
+        """Sleep for the given time, waking early if monitoring is stopped"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
     
     async def stop_monitoring(self):
         """Stop monitoring the log file"""
         self.running = False
+        self._stop_event.set()
+        self._close_log()
+        self._close_position_file()
         logger.info("Log monitoring stopped")
     
+    def _open_log(self):
+        """Open (or reopen) the log file descriptor used for incremental reads"""
+        self._close_log()
+        self._fd = os.open(self.log_file_path, os.O_RDONLY)
+        self._fd_ino = os.fstat(self._fd).st_ino
+    
+    def _close_log(self):
+        """Close the log file descriptor if open"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._fd_ino = None
+    
+    def _read_log(self, offset: int, size: int) -> bytes:
+        """Read size bytes at offset from the open log file"""
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, size, offset)
+        os.lseek(self._fd, offset, os.SEEK_SET)  # No pread on Windows
+        return os.read(self._fd, size)
+    
     async def load_position(self):
         """Load the last read position from file"""
         try:
-            if Path(self.position_file).exists():
-                async with aiofiles.open(self.position_file, 'r') as f:
-                    content = await f.read()
-                    self.last_position = int(content.strip())
-                    logger.debug(f"Loaded last position: {self.last_position}")
+            if os.path.exists(self.position_file):
+                with open(self.position_file, 'r') as f:
+                    self.last_position = int(f.read().strip())
+                    logger.debug("Loaded last position: %s", self.last_position)
             else:
                 # Start from end of file on first run
-                if Path(self.log_file_path).exists():
-                    self.last_position = Path(self.log_file_path).stat().st_size
-                    logger.info(f"Starting from end of log file: {self.last_position}")
+                if await aiofiles.os.path.exists(self.log_file_path):
+                    self.last_position = (await aiofiles.os.stat(self.log_file_path)).st_size
+                    logger.info("Starting from end of log file: %s", self.last_position)
         except Exception as e:
-            logger.error(f"Error loading position: {e}")
+            logger.error("Error loading position: %s", e)
             self.last_position = 0
     
     async def save_position(self):
-        """Save the current read position to file"""
+        """Save the current read position to file
+        
+        The position is overwritten in place as a fixed-width number through a
+        descriptor kept open while monitoring; it is only fsynced on stop.
+        """
         try:
-            async with aiofiles.open(self.position_file, 'w') as f:
-                await f.write(str(self.last_position))
-            logger.debug(f"Saved position: {self.last_position}")
+            if self._pos_fd is None:
+                self._pos_fd = os.open(self.position_file, os.O_RDWR | os.O_CREAT, 0o644)
+                os.ftruncate(self._pos_fd, POSITION_WIDTH)
+            
+            data = b"%0*d" % (POSITION_WIDTH, self.last_position)
+            if hasattr(os, 'pwrite'):
+                os.pwrite(self._pos_fd, data, 0)
+            else:
+                os.lseek(self._pos_fd, 0, os.SEEK_SET)  # No pwrite on Windows
+                os.write(self._pos_fd, data)
+            logger.debug("Saved position: %s", self.last_position)
         except Exception as e:
-            logger.error(f"Error saving position: {e}")
+            logger.error("Error saving position: %s", e)
+    
+    def _close_position_file(self):
+        """Flush and close the position file descriptor if open"""
+        if self._pos_fd is not None:
+            try:
+                os.fsync(self._pos_fd)
+            finally:
+                os.close(self._pos_fd)
+                self._pos_fd = None
     
     async def check_log_file(self):
         """Check log file for new content since last position"""
         try:
-            if not Path(self.log_file_path).exists():
-                logger.warning(f"Log file not found: {self.log_file_path}")
+            # Get current file size (stat runs in a worker thread)
+            try:
+                stat = await aiofiles.os.stat(self.log_file_path)
+            except FileNotFoundError:
+                logger.warning("Log file not found: %s", self.log_file_path)
                 return
+            current_size = stat.st_size
             
-            # Get current file size
-            current_size = Path(self.log_file_path).stat().st_size
-            
-            # Check if file was rotated (size decreased)
-            if current_size < self.last_position:
+            # Check if file was rotated (replaced by a new file, or truncated)
+            if self._fd is not None and stat.st_ino != self._fd_ino:
+                logger.info("Log file replaced, starting from beginning")
+                self._open_log()
+                self.last_position = 0
+            elif current_size < self.last_position:
                 logger.info("Log file rotated, starting from beginning")
                 self.last_position = 0
             
@@ -103,173 +199,189 @@ class LogWatcher:
             if current_size == self.last_position:
                 return
             
-            # Read new content
-            async with aiofiles.open(self.log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                await f.seek(self.last_position)
-                new_content = await f.read()
-                self.last_position = current_size
-            
-            if new_content:
-                await self.process_new_content(new_content)
+            # Read just the new bytes, at most MAX_READ_BYTES per pread so a large
+            # backlog doesn't block the event loop in one go
+            if self._fd is None:
+                self._open_log()
+            while self.last_position < current_size:
+                size = min(current_size - self.last_position, MAX_READ_BYTES)
+                data = self._read_log(self.last_position, size)
+                
+                # Only consume complete lines; a trailing partial line is read again
+                # once the server finishes writing it. A line longer than a whole
+                # read is consumed as-is so it can't stall the watcher.
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    if len(data) < MAX_READ_BYTES:
+                        break
+                    end = len(data)
+                
+                self.last_position += end
+                await self.process_new_content(data[:end])
                 await self.save_position()
                 
         except Exception as e:
-            logger.error(f"Error checking log file: {e}")
+            logger.error("Error checking log file: %s", e)
     
-    async def process_new_content(self, content: str):
-        """Process new log content for SCLOG events"""
+    async def process_new_content(self, content: bytes):
+        """Process new log content for SCLOG events
+        
+        A single regex pass over the raw bytes finds every event; only the
+        event payloads are decoded. All events in the chunk are then applied
+        together.
+        """
         try:
-            # Split into lines for processing
-            lines = content.split('\n')
-            
-            for line in lines:
-                if '--SCLOG-START--' in line and '--SCLOG-END--' in line:
-                    await self.process_sclog_event(line)
+            events = []
+            for match in SCLOG_PATTERN.finditer(content):
+                event = self.parse_sclog_event(match.group(1))
+                if event:
+                    events.append(event)
+            
+            if events:
+                await self.apply_events(events)
                     
         except Exception as e:
-            logger.error(f"Error processing new content: {e}")
+            logger.error("Error processing new content: %s", e)
     
-    async def process_sclog_event(self, line: str):
-        """Process a single SCLOG event from a log line"""
+    def parse_sclog_event(self, payload: bytes) -> Optional[Dict]:
+        """Parse a single SCLOG event from the raw text between its markers"""
         try:
             # Strip ANSI color codes
-            clean_line = self.ansi_pattern.sub('', line)
-            
-            # Extract SCLOG content
-            match = self.sclog_pattern.search(clean_line)
-            if not match:
-                logger.warning(f"Failed to extract SCLOG content from: {line[:100]}...")
-                return
+            if b'\x1b' in payload:
+                payload = ANSI_PATTERN.sub(b'', payload)
             
-            sclog_content = match.group(1).strip()
-            logger.debug(f"Processing SCLOG event: {sclog_content}")
+            sclog_content = payload.decode('utf-8', errors='ignore').strip()
+            logger.debug("Processing SCLOG event: %s", sclog_content)
             
-            # Determine event type and process
+            # Determine event type and parse
             if sclog_content.startswith('COURSE_ADDED:'):
-                await self.handle_course_added(sclog_content)
+                return self.parse_course_added(sclog_content[len('COURSE_ADDED:'):])
             elif sclog_content.startswith('COURSE_REMOVED:'):
-                await self.handle_course_removed(sclog_content)
+                return self.parse_course_removed(sclog_content[len('COURSE_REMOVED:'):])
             elif sclog_content.startswith('{'):
                 # JSON event (course expiry)
-                await self.handle_course_expired(sclog_content)
-            else:
-                logger.warning(f"Unknown SCLOG event type: {sclog_content[:50]}...")
+                return self.parse_course_expired(sclog_content)
+            
+            logger.warning("Unknown SCLOG event type: %s...", sclog_content[:50])
                 
         except Exception as e:
-            logger.error(f"Error processing SCLOG event: {e}")
+            logger.error("Error processing SCLOG event: %s", e)
+        return None
     
-    async def handle_course_added(self, content: str):
-        """Handle COURSE_ADDED event"""
+    def parse_course_added(self, content: str) -> Optional[Dict]:
+        """Parse a COURSE_ADDED event (content after the "COURSE_ADDED:" prefix)"""
         try:
-            # Parse: "COURSE_ADDED: racearena_pro (dash1) | 1758066824"
-            parts = content.split('COURSE_ADDED:', 1)[1].strip().split('|')
-            if len(parts) != 2:
-                logger.error(f"Invalid COURSE_ADDED format: {content}")
-                return
-            
-            full_course_name = parts[0].strip()
-            secret_until = int(parts[1].strip())
-            
-            # Get active season
-            season = await db_manager.get_active_season()
-            if not season:
-                logger.warning(f"No active season when adding course: {full_course_name}")
-                return
-            
-            # Add course to database
-            await db_manager.add_season_course(season['id'], full_course_name, secret_until)
-            
-            logger.info(f"Course added: {full_course_name}, expires at {datetime.fromtimestamp(secret_until)}")
-            
-            # Notify bot if available
-            if self.bot:
-                await self.notify_course_added(full_course_name, secret_until)
+            # Parse: " racearena_pro (dash1) | 1758066824"
+            name_part, sep, ts_part = content.partition('|')
+            if not sep or '|' in ts_part:
+                logger.error("Invalid COURSE_ADDED format: %s", content)
+                return None
+            
+            return {
+                'type': 'added',
+                'full_course_name': name_part.strip(),
+                'secret_until': int(ts_part)  # int() ignores surrounding whitespace
+            }
                 
         except Exception as e:
-            logger.error(f"Error handling COURSE_ADDED: {e}")
+            logger.error("Error handling COURSE_ADDED: %s", e)
+            return None
     
-    async def handle_course_removed(self, content: str):
-        """Handle COURSE_REMOVED event"""
-        try:
-            # Parse: "COURSE_REMOVED: racearena_pro (dash1)"
-            full_course_name = content.split('COURSE_REMOVED:', 1)[1].strip()
-
-            season = await db_manager.get_active_season()
-            if not season:
-                logger.warning(f"No active season when adding course: {full_course_name}")
-                return
-            
-            await db_manager.remove_season_course(season['id'], full_course_name)
-            
-            logger.info(f"Course removed: {full_course_name}")
-
-            if self.bot:
-                await self.notify_course_removed(full_course_name)
-            
-            # Note: This was a manual admin removal so we remove from database
-            
-            
-        except Exception as e:
-            logger.error(f"Error handling COURSE_REMOVED: {e}")
+    def parse_course_removed(self, content: str) -> Optional[Dict]:
+        """Parse a COURSE_REMOVED event (content after the "COURSE_REMOVED:" prefix)"""
+        # Parse: " racearena_pro (dash1)" - a manual admin removal
+        return {
+            'type': 'removed',
+            'full_course_name': content.strip()
+        }
     
-    async def handle_course_expired(self, content: str):
-        """Handle course expiry JSON event"""
+    def parse_course_expired(self, content: str) -> Optional[Dict]:
+        """Parse a course expiry JSON event"""
         try:
             # Parse JSON content
-            event_data = json.loads(content)
+            event_data = json_loads(content)
             
             if event_data.get('event') != 'secret_course_expired':
-                logger.warning(f"Unknown JSON event type: {event_data.get('event')}")
-                return
+                logger.warning("Unknown JSON event type: %s", event_data.get('event'))
+                return None
             
             full_course_name = event_data.get('coursename')
-            standings = event_data.get('standings', [])
-            
             if not full_course_name:
-                logger.error(f"Missing coursename in expiry event: {content}")
-                return
-            
-            # Mark course as expired and store standings
-            await db_manager.expire_course(full_course_name, event_data)
-            
-            logger.info(f"Course expired: {full_course_name} with {len(standings)} results")
-            
-            # Notify bot if available
-            if self.bot:
-                await self.notify_course_expired(full_course_name, event_data)
+                logger.error("Missing coursename in expiry event: %s", content)
+                return None
+            
+            return {
+                'type': 'expired',
+                'full_course_name': full_course_name,
+                'event_data': event_data,
+                'content': content
+            }
                 
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in SCLOG event: {e}")
+            logger.error("Invalid JSON in SCLOG event: %s", e)
         except Exception as e:
-            logger.error(f"Error handling course expiry: {e}")
+            logger.error("Error handling course expiry: %s", e)
+        return None
+    
+    async def apply_events(self, events: List[Dict]):
+        """Store a chunk's parsed events in one transaction, then notify for each"""
+        season = await db_manager.get_active_season()
+        if not season:
+            logger.warning("No active season, ignoring %s log events", len(events))
+            return
+        
+        try:
+            events = await db_manager.apply_sclog_batch(season['id'], events)
+        except Exception as e:
+            logger.error("Error storing log events: %s", e)
+            return
+        
+        # Notify only for events that were committed
+        for event in events:
+            full_course_name = event['full_course_name']
+            if event['type'] == 'added':
+                logger.info("Course added: %s, expires at %s", full_course_name,
+                            datetime.fromtimestamp(event['secret_until']))
+                if self.bot:
+                    await self.notify_course_added(full_course_name, event['secret_until'])
+            elif event['type'] == 'removed':
+                logger.info("Course removed: %s", full_course_name)
+                if self.bot:
+                    await self.notify_course_removed(full_course_name)
+            else:
+                logger.info("Course expired: %s with %s results", full_course_name,
+                            len(event['event_data'].get('standings', [])))
+                if self.bot:
+                    await self.notify_course_expired(full_course_name, event['event_data'])
     
     async def notify_course_added(self, full_course_name: str, secret_until: int):
         """Notify bot about course addition (for future live updates)"""
         try:
             # Extract course name for display
-            course_name = full_course_name.split('(')[1].split(')')[0] if '(' in full_course_name else full_course_name
+            course_name = parse_course_name(full_course_name)
             expiry_date = datetime.fromtimestamp(secret_until).strftime("%Y-%m-%d %H:%M:%S")
             
-            logger.info(f"Course '{course_name}' added, expires: {expiry_date}")
+            logger.info("Course '%s' added, expires: %s", course_name, expiry_date)
             # TODO: Update live messages when implemented in Phase 4
             
         except Exception as e:
-            logger.error(f"Error notifying course addition: {e}")
+            logger.error("Error notifying course addition: %s", e)
 
     async def notify_course_removed(self, full_course_name: str):
         try:
-            logger.info(f"Course '{full_course_name}' has been removed.")
+            logger.info("Course '%s' has been removed.", full_course_name)
             # TODO: Update live messages when implemented in Phase 4
         except Exception as e:
-            logger.error(f"Error notifying course removal: {e}")
+            logger.error("Error notifying course removal: %s", e)
     
     async def notify_course_expired(self, full_course_name: str, event_data: Dict):
         """Notify bot about course expiry (for immediate announcements)"""
         try:
-            course_name = full_course_name.split('(')[1].split(')')[0] if '(' in full_course_name else full_course_name
+            course_name = parse_course_name(full_course_name)
             standings = event_data.get('standings', [])
+            participants = len(standings)
             
-            logger.info(f"Course '{course_name}' expired with {len(standings)} participants")
+            logger.info("Course '%s' expired with %s participants", course_name, participants)
             
             # Send announcement if bot and channel are available
             if self.bot and config.get("announcement_channel_id"):
@@ -282,75 +394,32 @@ class LogWatcher:
                     )
                     
                     # Top 10 results
-                    top_10 = standings[:10]
-                    results_text = []
-                    
-                    for result in top_10:
-                        points = db_manager.calculate_points(result['rank'])
-                        medal = "🥇" if result['rank'] == 1 else "🥈" if result['rank'] == 2 else "🥉" if result['rank'] == 3 else f"{result['rank']}."
-                        results_text.append(f"{medal} {result['username']} - {result['time_str']}s ({points} pts)")
-                    
-                    embed.add_field(
-                        name=f"Final Standings ({len(standings)} participants)",
-                        value="\n".join(results_text),
-                        inline=False
+                    results_text = "\n".join(
+                        f"{rank_prefix(result['rank'])} {result['username']} - {result['time_str']}s "
+                        f"({db_manager.calculate_points(result['rank'])} pts)"
+                        for result in standings[:10]
                     )
                     
-                    embed.set_footer(text=f"Course expired at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    try:
-                        # Send message with @everyone ping
-                        await channel.send("@everyone", embed=embed)
-                        logger.info(f"Posted expiry announcement for {course_name} with @everyone ping")
-                    except Exception as e:
-                        logger.error(f"Error posting expiry announcement: {e}")
-            
-        except Exception as e:
-            logger.error(f"Error notifying course expiry: {e}")
-
-    async def notify_course_expired(self, full_course_name: str, event_data: Dict):
-        """Notify bot about course expiry (for immediate announcements)"""
-        try:
-            course_name = full_course_name.split('(')[1].split(')')[0] if '(' in full_course_name else full_course_name
-            standings = event_data.get('standings', [])
-            
-            logger.info(f"Course '{course_name}' expired with {len(standings)} participants")
-            
-            # Send announcement if bot and channel are available
-            if self.bot and config.get("announcement_channel_id"):
-                channel = self.bot.get_channel(config.get("announcement_channel_id"))
-                
-                if channel and standings:
-                    embed = discord.Embed(
-                        title=f"🏁 {course_name.title()} - Final Results",
-                        color=discord.Color.red()
-                    )
-                    
-                    # Top 10 results
-                    top_10 = standings[:10]
-                    results_text = []
-                    
-                    for result in top_10:
-                        points = db_manager.calculate_points(result['rank'])
-                        medal = "🥇" if result['rank'] == 1 else "🥈" if result['rank'] == 2 else "🥉" if result['rank'] == 3 else f"{result['rank']}."
-                        results_text.append(f"{medal} {result['username']} - {result['time_str']}s ({points} pts)")
-                    
                     embed.add_field(
-                        name=f"Final Standings ({len(standings)} participants)",
-                        value="\n".join(results_text),
+                        name=f"Final Standings ({participants} participants)",
+                        value=results_text,
                         inline=False
                     )
                     
                     embed.set_footer(text=f"Course expired at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                     
                     try:
-                        await channel.send(embed=embed)
-                        logger.info(f"Posted expiry announcement for {course_name}")
+                        if config.get("ping_everyone_on_expire", False):
+                            await channel.send("@everyone", embed=embed)
+                            logger.info("Posted expiry announcement for %s with @everyone ping", course_name)
+                        else:
+                            await channel.send(embed=embed)
+                            logger.info("Posted expiry announcement for %s", course_name)
                     except Exception as e:
-                        logger.error(f"Error posting expiry announcement: {e}")
+                        logger.error("Error posting expiry announcement: %s", e)
             
         except Exception as e:
-            logger.error(f"Error notifying course expiry: {e}")
+            logger.error("Error notifying course expiry: %s", e)
 
 # Global log watcher instance
 log_watcher = LogWatcher()
\ No newline at end of file
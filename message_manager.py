@@ -3,10 +3,13 @@ Message manager for live Discord updates
 Handles the 3-message system and periodic updates
 """
 import discord
+from discord.ext import tasks
 import asyncio
+import hashlib
+import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from config import config
 from db_manager import db_manager
@@ -19,9 +22,20 @@ class MessageManager:
     
     def __init__(self, bot_instance=None):
         self.bot = bot_instance
-        self.running = False
-        self.update_task = None
         
+        # Content hash of the last embed posted per (season_id, message_type)
+        self._embed_hashes: Dict[Tuple[int, str], bytes] = {}
+        
+        # tasks.loop keeps a fixed schedule and only ever runs one instance;
+        # the interval is re-read from config each time updates are started
+        self.update_loop = tasks.loop(seconds=300)(self.update_all_messages)
+        self.update_loop.before_loop(self._wait_until_ready)
+    
+    @property
+    def running(self) -> bool:
+        """Whether the live update loop is running"""
+        return self.update_loop.is_running()
+    
     def set_bot(self, bot_instance):
         """Set bot instance"""
         self.bot = bot_instance
@@ -40,44 +54,36 @@ class MessageManager:
             logger.warning("No announcement channel configured")
             return
         
-        self.running = True
         logger.info("Starting live message updates")
         
-        # Start update task
-        self.update_task = asyncio.create_task(self._update_loop())
+        self.update_loop.change_interval(seconds=config.get("message_update_interval", 300))
+        self.update_loop.start()
     
     async def stop_live_updates(self):
         """Stop the live update loop"""
         if not self.running:
             return
         
-        self.running = False
-        if self.update_task:
-            self.update_task.cancel()
-            try:
-                await self.update_task
-            except asyncio.CancelledError:
-                pass
+        task = self.update_loop.get_task()
+        self.update_loop.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
         
         logger.info("Live message updates stopped")
     
-    async def _update_loop(self):
-        """Main update loop"""
-        while self.running:
-            try:
-                await self.update_all_messages()
-                
-                interval = config.get("message_update_interval", 300)
-                await asyncio.sleep(interval)
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Error in update loop: {e}")
-                await asyncio.sleep(60)  # Wait longer on error
+    async def _wait_until_ready(self):
+        """Hold the first update until the bot's cache is ready"""
+        if self.bot:
+            await self.bot.wait_until_ready()
     
-    async def update_all_messages(self):
-        """Update all live messages"""
+    async def update_all_messages(self, force: bool = False):
+        """Update all live messages
+        
+        force edits every message even if its content is unchanged (and so
+        re-posts any that were deleted).
+        """
         try:
             season = await db_manager.get_active_season()
             if not season:
@@ -90,75 +96,111 @@ class MessageManager:
             
             channel = self.bot.get_channel(channel_id)
             if not channel:
-                logger.error(f"Announcement channel {channel_id} not found")
+                logger.error("Announcement channel %s not found", channel_id)
                 return
             
-            # Get current data
-            leaderboard = await db_manager.get_season_leaderboard_with_projections(season['id'])
-            courses = await db_manager.get_active_courses(season['id'])
-            current_standings = await self._get_current_standings(courses)
-            
-            # Get stored message IDs
-            stored_messages = await db_manager.get_message_ids(season['id'])
+            # Get current data and stored message IDs; the bot database reads use
+            # separate pooled connections from the main database, so these overlap
+            leaderboard, (courses, current_standings), stored_messages = await asyncio.gather(
+                db_manager.get_season_leaderboard_with_projections(season['id']),
+                self._get_courses_with_standings(season['id']),
+                db_manager.get_message_ids(season['id'])
+            )
             
             # Update each message type if enabled
             toggles = config.get("message_toggles", {})
+            updates = []
             
             if toggles.get("season_summary", True):
-                await self._update_message(
-                    channel, "season_summary", season, stored_messages,
-                    MessageFormatter.create_season_summary(season, leaderboard)
-                )
+                updates.append(("season_summary", MessageFormatter.create_season_summary(season, leaderboard)))
             
             if toggles.get("season_standings", True):
-                await self._update_message(
-                    channel, "season_standings", season, stored_messages,
-                    MessageFormatter.create_season_standings(season, leaderboard)
-                )
+                updates.append(("season_standings", MessageFormatter.create_season_standings(season, leaderboard)))
             
             if toggles.get("course_grid", True):
-                await self._update_message(
-                    channel, "course_grid", season, stored_messages,
-                    MessageFormatter.create_course_grid(season, courses, current_standings)
-                )
+                updates.append(("course_grid", MessageFormatter.create_course_grid(season, courses, current_standings)))
+            
+            # Edits of existing messages are independent, so they can overlap
+            existing = [(message_type, embed) for message_type, embed in updates
+                        if stored_messages.get(message_type)]
+            edited = await asyncio.gather(
+                *(self._edit_message(channel, message_type, season, stored_messages[message_type], embed, force)
+                  for message_type, embed in existing)
+            )
+            missing = {message_type for (message_type, _), ok in zip(existing, edited) if not ok}
+            
+            # New messages are sent one after another so they keep their channel order
+            for message_type, embed in updates:
+                if message_type in missing or not stored_messages.get(message_type):
+                    await self._create_message(channel, message_type, season, embed)
             
             logger.debug("Live messages updated successfully")
             
         except Exception as e:
-            logger.error(f"Error updating live messages: {e}")
+            logger.error("Error updating live messages: %s", e)
     
-    async def _update_message(self, channel: discord.TextChannel, message_type: str, 
-                             season: Dict, stored_messages: Dict, embed: discord.Embed):
-        """Update or create a single message"""
+    async def _edit_message(self, channel: discord.TextChannel, message_type: str,
+                            season: Dict, message_info: Dict, embed: discord.Embed,
+                            force: bool = False) -> bool:
+        """Edit a stored message, returning False if it has to be created again
+        
+        Unless forced, skips the edit when the embed's content (ignoring the
+        "Last updated" footer) matches what was last posted for this message
+        in this channel.
+        """
         try:
-            message_info = stored_messages.get(message_type)
-            message = None
+            key = (season['id'], message_type)
+            embed_hash = self._embed_hash(embed)
+            if (not force and message_info['channel_id'] == channel.id
+                    and self._embed_hashes.get(key) == embed_hash):
+                logger.debug("%s message unchanged, skipping edit", message_type)
+                return True
             
-            # Try to get existing message
-            if message_info:
-                try:
-                    message = await channel.fetch_message(message_info['message_id'])
-                except discord.NotFound:
-                    logger.info(f"Stored {message_type} message not found, will create new one")
-                    await db_manager.delete_message_id(message_type, season['id'])
-                except Exception as e:
-                    logger.warning(f"Error fetching {message_type} message: {e}")
-            
-            # Update existing message or create new one
-            if message:
+            # Edit through a partial handle (no fetch needed)
+            message = channel.get_partial_message(message_info['message_id'])
+            try:
                 await message.edit(embed=embed)
-                logger.debug(f"Updated existing {message_type} message")
-            else:
-                message = await channel.send(embed=embed)
-                await db_manager.store_message_id(message_type, channel.id, message.id, season['id'])
-                logger.info(f"Created new {message_type} message: {message.id}")
+            except discord.NotFound:
+                logger.info("Stored %s message not found, will create new one", message_type)
+                await db_manager.delete_message_id(message_type, season['id'])
+                return False
+            
+            self._embed_hashes[key] = embed_hash
+            logger.debug("Updated existing %s message", message_type)
             
         except Exception as e:
-            logger.error(f"Error updating {message_type} message: {e}")
+            logger.error("Error updating %s message: %s", message_type, e)
+        return True
+    
+    async def _create_message(self, channel: discord.TextChannel, message_type: str,
+                              season: Dict, embed: discord.Embed):
+        """Send a new message and remember it for later edits"""
+        try:
+            message = await channel.send(embed=embed)
+            await db_manager.store_message_id(message_type, channel.id, message.id, season['id'])
+            self._embed_hashes[(season['id'], message_type)] = self._embed_hash(embed)
+            logger.info("Created new %s message: %s", message_type, message.id)
+            
+        except Exception as e:
+            logger.error("Error creating %s message: %s", message_type, e)
+    
+    @staticmethod
+    def _embed_hash(embed: discord.Embed) -> bytes:
+        """Digest of an embed's content, leaving out the footer timestamp"""
+        data = embed.to_dict()
+        data.pop('footer', None)
+        payload = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+        return hashlib.blake2b(payload, digest_size=16).digest()
+    
+    async def _get_courses_with_standings(self, season_id: int) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+        """Get a season's courses together with the standings shown for each"""
+        courses = await db_manager.get_active_courses(season_id, with_standings=True)
+        return courses, await self._get_current_standings(courses)
     
     async def _get_current_standings(self, courses: List[Dict]) -> Dict[str, List[Dict]]:
         """Get current standings for all active courses"""
         standings = {}
+        active_courses = []
         
         for course in courses:
             if course['expired']:
@@ -166,9 +208,14 @@ class MessageManager:
                 if course.get('final_standings') and course['final_standings'].get('standings'):
                     standings[course['course_name']] = course['final_standings']['standings']
             else:
-                # Get live standings for active courses
-                live_standings = await db_manager.get_current_standings(course['full_course_name'])
-                standings[course['course_name']] = live_standings
+                active_courses.append(course)
+        
+        # Live standings for all active courses in one query
+        live_standings = await db_manager.get_current_standings_multi(
+            [course['full_course_name'] for course in active_courses]
+        )
+        for course in active_courses:
+            standings[course['course_name']] = live_standings[course['full_course_name']]
         
         return standings
     
@@ -179,11 +226,11 @@ class MessageManager:
             return False
         
         try:
-            await self.update_all_messages()
+            await self.update_all_messages(force=True)
             logger.info("Forced message update completed")
             return True
         except Exception as e:
-            logger.error(f"Error in force update: {e}")
+            logger.error("Error in force update: %s", e)
             return False
 
 # Global message manager instance
@@ -0,0 +1,87 @@
+"""
+Background task scheduler for SecretCourse Discord Bot
+Runs background jobs in priority order with a bounded concurrency limit
+"""
+import asyncio
+import itertools
+import logging
+from enum import IntEnum
+from typing import Awaitable, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class Priority(IntEnum):
+    """Job priority - lower values are started first"""
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+class BackgroundScheduler:
+    """Starts queued background jobs by priority, at most max_concurrent at a time"""
+
+    def __init__(self, max_concurrent: int = 4):
+        self.max_concurrent = max_concurrent
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._counter = itertools.count()  # FIFO tie-break within a priority
+
+    def start(self):
+        """Start the dispatcher loop (no-op if already running)"""
+        if self._dispatcher and not self._dispatcher.done():
+            return
+
+        if self.queue is None:
+            self.queue = asyncio.PriorityQueue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        logger.info("Background scheduler started (max %s concurrent jobs)", self.max_concurrent)
+
+    def submit(self, priority: Priority, coro_factory: Callable[[], Awaitable], name: str = None):
+        """Queue a job; coro_factory is called when the job is started"""
+        if self.queue is None:
+            self.start()
+
+        name = name or getattr(coro_factory, "__qualname__", "job")
+        self.queue.put_nowait((priority, next(self._counter), coro_factory, name))
+        logger.debug("Queued background job %s (%s)", name, priority.name)
+
+    async def _dispatch_loop(self):
+        """Start queued jobs in priority order as concurrency slots free up"""
+        while True:
+            priority, _, coro_factory, name = await self.queue.get()
+            await self._slots.acquire()
+
+            task = asyncio.create_task(self._run(coro_factory, name))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, coro_factory: Callable[[], Awaitable], name: str):
+        """Run a single job and release its slot when done"""
+        try:
+            await coro_factory()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Background job %s failed: %s", name, e)
+        finally:
+            self._slots.release()
+            self.queue.task_done()
+
+    async def stop(self):
+        """Cancel the dispatcher and any running jobs"""
+        tasks = list(self._tasks)
+        if self._dispatcher:
+            tasks.append(self._dispatcher)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._dispatcher = None
+        logger.info("Background scheduler stopped")
+
+# Global scheduler instance
+scheduler = BackgroundScheduler()
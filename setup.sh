@@ -22,7 +22,7 @@ pip install --upgrade pip
 
 # Install requirements
 echo "Installing Python packages..."
-pip install discord.py==2.3.2 watchdog==3.0.0 python-dateutil==2.8.2 aiosqlite==0.19.0
+pip install discord.py==2.3.2 watchfiles==0.21.0 python-dateutil==2.8.2 aiosqlite==0.19.0
 
 # Create logs directory
 mkdir -p logs